@@ -0,0 +1,85 @@
+"""Compare the old trending query with the trending_score index read.
+
+The old query joined every comment of the last week onto posts and grouped by
+post on each request; trending now reads the top of ix_posts_trending_score_id.
+Builds a throwaway SQLite database, so run it from the repo root with the usual
+.env in place:
+
+    uv run python scripts/bench_trending.py --posts 1000000 --comments 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, select, desc, func, insert
+from sqlalchemy.orm import Session, selectinload
+import src.app  # noqa: F401  registers every model on Base, in import order
+from src.database import Base
+from src.post.models import Post
+from src.post.trending import rebuild_trending_scores
+from src.post_actions.models import Comment
+
+BATCH_SIZE = 50_000
+
+def populate(engine, posts: int, comments: int):
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for start in range(1, posts + 1, BATCH_SIZE):
+            conn.execute(insert(Post), [
+                {"id": post_id, "title": f"Post {post_id}", "description": "benchmark post",
+                 "upvotes_count": rng.randint(0, 50), "created_at": now - timedelta(seconds=rng.randint(0, 30 * 86400))}
+                for post_id in range(start, min(start + BATCH_SIZE, posts + 1))
+            ])
+        for start in range(1, comments + 1, BATCH_SIZE):
+            conn.execute(insert(Comment), [
+                {"id": comment_id, "post_id": rng.randint(1, posts), "user_id": 1, "content": "benchmark comment",
+                 "created_at": now - timedelta(seconds=rng.randint(0, 30 * 86400))}
+                for comment_id in range(start, min(start + BATCH_SIZE, comments + 1))
+            ])
+
+def old_query(db: Session, limit: int):
+    seven_days_ago = datetime.utcnow() - timedelta(days=7)
+    return db.execute(
+        select(Post, (Post.upvotes_count + func.count(Comment.id)).label("score"))
+        .outerjoin(Comment).where(Post.created_at >= seven_days_ago)
+        .group_by(Post.id).order_by(desc("score")).limit(limit).options(selectinload(Post.author))
+    ).all()
+
+def index_read(db: Session, limit: int):
+    return db.scalars(
+        select(Post).order_by(Post.trending_score.desc(), Post.id.desc())
+        .limit(limit).options(selectinload(Post.author))
+    ).all()
+
+def best_of(runs: int, fn) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--comments", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        start = time.perf_counter()
+        populate(engine, args.posts, args.comments)
+        with Session(engine) as db:
+            rebuild_trending_scores(db)
+            print(f"{args.posts} posts, {args.comments} comments loaded in {time.perf_counter() - start:.0f}s")
+            print(f"old join/group query: {best_of(args.runs, lambda: old_query(db, 5)) * 1000:.2f} ms")
+            print(f"index read:           {best_of(args.runs, lambda: index_read(db, 5)) * 1000:.2f} ms")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Micro-benchmark of Ed25519 login signature verification.
+
+Compares the old path (parse the stored key on every call, verify inline on the
+event loop) with src/auth/crypto.py (cached key, verify on the bounded pool):
+verifies per second, and the worst event-loop stall during a burst of logins.
+Run it from the repo root with the usual .env in place:
+
+    uv run python scripts/bench_verify.py --calls 20000 --burst 200
+"""
+import argparse
+import asyncio
+import base64
+import time
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+from src.auth.crypto import verify_ed25519_signature, verify_ed25519_signature_async
+
+def verify_uncached(public_key_str: str, message: str, signature_b64: str) -> bool:
+    # verify_ed25519_signature before the key cache
+    try:
+        pub = Ed25519PublicKey.from_public_bytes(base64.b64decode(public_key_str))
+        pub.verify(base64.b64decode(signature_b64), message.encode())
+        return True
+    except Exception:
+        return False
+
+def make_login(index: int) -> tuple[str, str, str]:
+    private_key = Ed25519PrivateKey.generate()
+    public_key = base64.b64encode(private_key.public_key().public_bytes_raw()).decode()
+    challenge = f"challenge-{index}"
+    return public_key, challenge, base64.b64encode(private_key.sign(challenge.encode())).decode()
+
+def throughput(verify, logins: list, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        assert verify(*logins[i % len(logins)])
+    return calls / (time.perf_counter() - start)
+
+async def worst_stall(verify_burst) -> float:
+    """Longest gap seen by a 1 ms ticker while verify_burst runs."""
+    stalls, done = [0.0], asyncio.Event()
+
+    async def ticker():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stalls.append(now - last - 0.001)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    await verify_burst()
+    done.set()
+    await task
+    return max(stalls)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--burst", type=int, default=200)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+    logins = [make_login(i) for i in range(args.users)]
+    burst = [logins[i % len(logins)] for i in range(args.burst)]
+
+    print(f"before (parse per call): {throughput(verify_uncached, logins, args.calls):8.0f} verifies/s")
+    print(f"after (cached key):      {throughput(verify_ed25519_signature, logins, args.calls):8.0f} verifies/s")
+
+    async def verify_inline(login):
+        # What the /verify handler used to do: call the sync check straight from the coroutine
+        return verify_uncached(*login)
+
+    async def inline():
+        await asyncio.gather(*(verify_inline(login) for login in burst))
+
+    async def pooled():
+        await asyncio.gather(*(verify_ed25519_signature_async(*login) for login in burst))
+
+    for name, verify_burst in (("before (inline)", inline), ("after (pooled)", pooled)):
+        stalls = [await worst_stall(verify_burst) for _ in range(5)]
+        print(f"{name + ':':17} worst loop stall over a burst of {args.burst}: {min(stalls) * 1000:.1f}-{max(stalls) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
 from src.agent.schemas import AnalyzeCallback
 from src.auth.auth_dependencies import DB_SESSION
 from src.post.models import Post, PostStatus
+from src.post.service import invalidate_feed_cache
 from src.config import settings
 
 router = APIRouter()
@@ -24,7 +24,7 @@ async def agent_callback(
     from src.core.websocket_manager import manager
     
     post_id = get_valid_post_id(payload.report_id)
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await db.get(Post, post_id)
     
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
@@ -40,8 +40,8 @@ async def agent_callback(
     # We could also save payload.flags, payload.pii_found, and payload.integral_score
     # into a dedicated Moderation log table or extra columns if they exist.
     
-    db.commit()
-    db.refresh(post)
+    await db.commit()
+    await invalidate_feed_cache()
     
     # Broadcast the status update to connected clients
     await manager.broadcast({
@@ -7,7 +7,15 @@ from .notifications.router import router as notifications_router
 from .search.router import router as search_router
 from src.core.errors.exception_handlers import (app_exception_handler, unhandled_exception_handler)
 from src.core.errors.base_exception import AppException
-from src.database import Base, engine
+from src.database import Base, async_engine
+from src.migrations import run_migrations
+from src.search.pseudonyms import pseudonym_search
+from src.search.inverted_index import post_index
+from src.post_actions.vote_buffer import vote_buffer
+from src.auth.blacklist_service import blacklist
+from src.auth.pseudonym_filter import pseudonym_filter
+from src.auth.token_gc import refresh_token_purger
+from src.tasks.queue import task_queue
 from fastapi.middleware.cors import CORSMiddleware
 from .config import settings
 
@@ -16,6 +24,7 @@ from src.auth.models.user_account import User_Account
 from src.post.models import Post
 from src.post_actions.models import Comment, Vote
 from src.notifications.models import Notification
+from src.tasks.models import OutboxTask
 
 app = FastAPI(title="Ichtaka API", description="Secure, anonymous reporting and social platform")
 
@@ -67,9 +76,41 @@ app.include_router(
     tags=["Agent Integration"]
 )
 
+from src.internal.router import router as internal_router
+app.include_router(
+    internal_router,
+    prefix="/v1/internal",
+    tags=["Internal"]
+)
+
 @app.on_event("startup")
-def on_startup():
-    Base.metadata.create_all(bind=engine)
+async def on_startup():
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
+        await conn.run_sync(pseudonym_search.setup)
+        await conn.run_sync(pseudonym_filter.build)
+        if post_index:
+            await conn.run_sync(post_index.build)
+    if vote_buffer:
+        vote_buffer.start()
+    blacklist.start()
+    pseudonym_filter.start()
+    refresh_token_purger.start()
+    task_queue.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await blacklist.stop()
+    pseudonym_filter.stop()
+    refresh_token_purger.stop()
+    await task_queue.stop()
+    if vote_buffer:
+        await vote_buffer.stop()
+    if post_index and post_index.snapshot_path:
+        async with async_engine.connect() as conn:
+            await conn.run_sync(post_index.snapshot)
+    await async_engine.dispose()
 
 @app.get("/")
 def read_root():
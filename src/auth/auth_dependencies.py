@@ -1,77 +1,110 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+import hashlib
+import time
 import jwt
-from sqlalchemy.orm import Session
+from dataclasses import dataclass
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.config import settings
 from src.auth.models.user_account import User_Account
+from src.core.cache import MemoryCache
 from src.database import get_db
 from typing import Annotated, Optional
 from .blacklist_service import blacklist
 
 security = HTTPBearer()
-DB_SESSION = Annotated[Session, Depends(get_db)]
+DB_SESSION = Annotated[AsyncSession, Depends(get_db)]
 
-def get_current_user(
-    db: DB_SESSION,
-    auth: HTTPAuthorizationCredentials = Depends(security)
-) -> User_Account:
-    if blacklist.is_blacklisted(auth.credentials):
+@dataclass(frozen=True)
+class UserPrincipal:
+    """The authenticated user as far as routes need it; load the User_Account row for anything else."""
+    id: int
+    pseudonym: str
+
+# Per process on purpose: a shared store would put a round-trip back on every request.
+# Holds token hash -> principal and user id -> principal.
+principal_cache = MemoryCache(settings.AUTH_CACHE_MAX_ENTRIES)
+
+def token_cache_key(token: str) -> str:
+    return "token:" + hashlib.sha256(token.encode()).hexdigest()
+
+async def forget_token(token: str):
+    await principal_cache.delete(token_cache_key(token))
+
+async def _load_principal(db: AsyncSession, user_id: int) -> Optional[UserPrincipal]:
+    key = f"user:{user_id}"
+    principal = await principal_cache.get(key)
+    if principal is None:
+        row = (await db.execute(
+            select(User_Account.id, User_Account.pseudonym).where(User_Account.id == user_id)
+        )).first()
+        if row is None:
+            return None
+        principal = UserPrincipal(id=row.id, pseudonym=row.pseudonym)
+        await principal_cache.set(key, principal, settings.AUTH_CACHE_TTL_SECONDS)
+    return principal
+
+async def authenticate(db: AsyncSession, token: str) -> UserPrincipal:
+    if await blacklist.is_blacklisted(token):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has been revoked: please log in again"
         )
+    key = token_cache_key(token)
+    principal = await principal_cache.get(key)
+    if principal is not None:
+        return principal
     try:
         payload = jwt.decode(
-            auth.credentials, 
-            settings.JWT_SECRET_KEY, 
+            token,
+            settings.JWT_SECRET_KEY,
             algorithms=[settings.JWT_ALGORITHM]
         )
-        user_id = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
-        user = db.query(User_Account).filter(User_Account.id == int(user_id)).first()
-        if user is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        return user
     except jwt.PyJWTError as e:
         print(e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
+    user_id = payload.get("sub")
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
 
-CURRENT_USER = Annotated[User_Account, Depends(get_current_user)]
+    principal = await _load_principal(db, int(user_id))
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    # Never outlive the token itself
+    ttl = min(settings.AUTH_CACHE_TTL_SECONDS, int(payload.get("exp", 0) - time.time()))
+    if ttl > 0:
+        await principal_cache.set(key, principal, ttl)
+    return principal
+
+async def get_current_user(
+    db: DB_SESSION,
+    auth: HTTPAuthorizationCredentials = Depends(security)
+) -> UserPrincipal:
+    return await authenticate(db, auth.credentials)
+
+CURRENT_USER = Annotated[UserPrincipal, Depends(get_current_user)]
 
 optional_security = HTTPBearer(auto_error=False)
 
-def get_optional_current_user(
+async def get_optional_current_user(
     db: DB_SESSION,
     auth: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
-) -> Optional[User_Account]:
+) -> Optional[UserPrincipal]:
     if not auth:
         return None
-    if blacklist.is_blacklisted(auth.credentials):
-        return None
     try:
-        payload = jwt.decode(
-            auth.credentials, 
-            settings.JWT_SECRET_KEY, 
-            algorithms=[settings.JWT_ALGORITHM]
-        )
-        user_id = payload.get("sub")
-        if user_id is None:
-            return None
-        
-        user = db.query(User_Account).filter(User_Account.id == int(user_id)).first()
-        return user
-    except jwt.PyJWTError:
+        return await authenticate(db, auth.credentials)
+    except HTTPException:
         return None
 
-OPTIONAL_CURRENT_USER = Annotated[Optional[User_Account], Depends(get_optional_current_user)]
\ No newline at end of file
+OPTIONAL_CURRENT_USER = Annotated[Optional[UserPrincipal], Depends(get_optional_current_user)]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, conlist
-from typing import Annotated, List
+from typing import Annotated, List, Optional
 RecoveryPhraseHashes = Annotated[
     List[str],
     Field(
@@ -48,3 +48,7 @@ class RefreshTokenRequest(BaseModel):
 class UserListResponse(BaseModel):
     pseudonym: str
     is_following: bool = False
+
+class UserListPage(BaseModel):
+    users: list[UserListResponse]
+    next_cursor: Optional[str] = None
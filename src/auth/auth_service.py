@@ -1,14 +1,26 @@
 import secrets
 import jwt
 from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import select, update, delete, func, tuple_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from fastapi import status, Response
 from .models import User_Account, Follow
-from .auth_schemas import SignupRequest, SignUpResponse, VerifyRequest, VerifyResponse, LoginRequest, LoginResponse, UserListResponse
+from .follow_graph import followed_ids
+from .auth_dependencies import UserPrincipal
+from .auth_schemas import SignupRequest, SignUpResponse, VerifyRequest, VerifyResponse, LoginRequest, LoginResponse, UserListResponse, UserListPage
 from src.config import settings
 from src.core.errors.exceptions import (AlreadyExists, NotFound, InvalidSignature)
 from src.core.utils.response import SuccessResponse
-from src.auth.crypto import verify_ed25519_signature
+from src.auth.crypto import verify_ed25519_signature_async
+from src.auth.challenge_store import challenge_store
+from src.auth.pseudonym_filter import pseudonym_filter
+from src.search.pseudonyms import pseudonym_search
+from src.tasks.queue import task_queue
+from src.utils.encoding import encode_cursor
+from src.database import dialect_insert
 
 JWT_SECRET = settings.JWT_SECRET_KEY
 JWT_ALG = settings.JWT_ALGORITHM
@@ -42,24 +54,31 @@ def create_refresh_token(user_id: int):
 def generate_login_id():
     return f"user_{secrets.token_hex(8)}"
 
-def signup(db: Session, data: SignupRequest):
-    existing_pseudonym = db.query(User_Account).filter(User_Account.pseudonym == data.pseudonym).first()
-    if existing_pseudonym:
-        raise AlreadyExists("This pseudonym is already in use")
+async def signup(db: AsyncSession, data: SignupRequest):
+    if pseudonym_filter.might_exist(data.pseudonym):
+        existing_pseudonym = await db.scalar(select(User_Account.id).where(User_Account.pseudonym == data.pseudonym))
+        if existing_pseudonym:
+            raise AlreadyExists("This pseudonym is already in use")
     
     login_id = generate_login_id()
-    challenge = secrets.token_urlsafe(32)
     
     new_user = User_Account(
         login_id=login_id,
         public_key=data.public_key,
         pseudonym=data.pseudonym,
-        recovery_phrase_hashes=data.recovery_phrase_hashes,
-        current_challenge=challenge
+        recovery_phrase_hashes=data.recovery_phrase_hashes
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Taken since the pre-check, or by another worker this filter hasn't caught up with
+        await db.rollback()
+        raise AlreadyExists("This pseudonym is already in use")
+    await db.refresh(new_user)
+    pseudonym_filter.add(new_user.pseudonym)
+    pseudonym_search.add(new_user.pseudonym)
+    challenge = await challenge_store.issue(new_user.pseudonym)
     
     return SuccessResponse(
         message="Signup successful. Verify the challenge to complete registration.", 
@@ -71,48 +90,45 @@ def signup(db: Session, data: SignupRequest):
         )
     )
 
-def login(db: Session, data: LoginRequest):
-    user = db.query(User_Account).filter(User_Account.pseudonym == data.pseudonym).first()
+async def login(db: AsyncSession, data: LoginRequest):
+    # Existence check only; the challenge lives in the challenge store, not on the user row
+    user = await db.scalar(select(User_Account.pseudonym).where(User_Account.pseudonym == data.pseudonym))
     if not user:
         raise NotFound("User not found.")
     
-    challenge = secrets.token_urlsafe(32)
-    user.current_challenge = challenge
-    db.add(user)
-    db.commit()
+    challenge = await challenge_store.issue(data.pseudonym)
     
     return SuccessResponse(
         message="Challenge generated. Please sign it with your private key.",
         code=status.HTTP_200_OK,
         data=LoginResponse(
-            pseudonym=user.pseudonym,
+            pseudonym=data.pseudonym,
             challenge=challenge
         )
     )
 
-def check_username(db: Session, user_name: str):
-    user = db.query(User_Account).filter(User_Account.pseudonym == user_name).first()
-    
-    if user:
-        raise AlreadyExists('The pseudonym is already in use')
+async def check_username(db: AsyncSession, user_name: str):
+    # A filter miss is definitive; only possible hits need the indexed lookup
+    if pseudonym_filter.might_exist(user_name):
+        user = await db.scalar(select(User_Account.id).where(User_Account.pseudonym == user_name))
+        if user:
+            raise AlreadyExists('The pseudonym is already in use')
     return SuccessResponse(message="Pseudonym available", code=200, data={"is_available": True})
 
-def verify_auth(db: Session, data: VerifyRequest, response: Response):
-    user = db.query(User_Account).filter(User_Account.pseudonym == data.pseudonym).first()
+async def verify_auth(db: AsyncSession, data: VerifyRequest, response: Response):
+    user = await db.scalar(select(User_Account).where(User_Account.pseudonym == data.pseudonym))
     if not user:
         raise NotFound('This user account does not exist.')
     
-    if not user.current_challenge:
+    challenge = await challenge_store.take(user.pseudonym)
+    if not challenge:
         raise InvalidSignature("No active challenge: try logging in.")
     
-    ok = verify_ed25519_signature(user.public_key, user.current_challenge, signature_b64=data.signature)
+    ok = await verify_ed25519_signature_async(user.public_key, challenge, signature_b64=data.signature)
     if not ok:
-        user.current_challenge = None
-        db.add(user)
-        db.commit()
         raise InvalidSignature('Authentication Failed')
     
-    db.query(RefreshToken).filter(RefreshToken.user_id == user.id).delete()
+    await db.execute(delete(RefreshToken).where(RefreshToken.user_id == user.id))
     
     
     # Generate Tokens
@@ -131,11 +147,7 @@ def verify_auth(db: Session, data: VerifyRequest, response: Response):
         expires_at=refresh_expires_at
     )
     db.add(new_refresh_token_entry)
-    
-    user.current_challenge = None
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
     
     # Set cookies
     # response.set_cookie(
@@ -166,23 +178,23 @@ def verify_auth(db: Session, data: VerifyRequest, response: Response):
         )
     )
 
-def refresh_access_token(db: Session, refresh_token: str, response: Response):
+async def refresh_access_token(db: AsyncSession, refresh_token: str, response: Response):
     if not refresh_token:
         raise NotFound("Refresh token missing")
     token_hash = get_token_hash(refresh_token)
     
-    db_token = db.query(RefreshToken).filter(RefreshToken.token_hash == token_hash).first()
+    db_token = await db.scalar(select(RefreshToken).where(RefreshToken.token_hash == token_hash))
     if not db_token:
         raise NotFound("Invalid refresh token")
         
     if db_token.expires_at < datetime.utcnow():
-        db.delete(db_token)
-        db.commit()
+        await db.delete(db_token)
+        await db.commit()
         raise InvalidSignature("Refresh token expired")
         
     # Generate new access token
     # We need user details.
-    user = db_token.user
+    user = await db.get(User_Account, db_token.user_id)
     if not user:
         # Should not happen due to FK
         raise NotFound("User not found")
@@ -209,14 +221,16 @@ def refresh_access_token(db: Session, refresh_token: str, response: Response):
         data={"access_token": new_access_token}
     )
 
-def logout(db: Session, refresh_token: str, response: Response, access_token: str = None):
+async def logout(db: AsyncSession, refresh_token: str, response: Response, access_token: str = None):
     if refresh_token:
         token_hash = get_token_hash(refresh_token)
-        db.query(RefreshToken).filter(RefreshToken.token_hash == token_hash).delete()
+        await db.execute(delete(RefreshToken).where(RefreshToken.token_hash == token_hash))
     if access_token:
         from .blacklist_service import blacklist
-        blacklist.add(access_token)
-    db.commit()
+        from .auth_dependencies import forget_token
+        await blacklist.add(access_token)
+        await forget_token(access_token)
+    await db.commit()
 
     # Clear cookies
     response.delete_cookie("auth_token")
@@ -224,105 +238,141 @@ def logout(db: Session, refresh_token: str, response: Response, access_token: st
 
     return SuccessResponse(message="Logged out successfully", code=status.HTTP_200_OK)
 
-def toggle_follow(db: Session, follower: User_Account, target_pseudonym: str):
-    target_user = db.query(User_Account).filter(User_Account.pseudonym == target_pseudonym).first()
+async def _adjust_follow_counts(db: AsyncSession, follower_id: int, followed_id: int, delta: int):
+    updates = {
+        follower_id: {"following_count": User_Account.following_count + delta},
+        followed_id: {"followers_count": User_Account.followers_count + delta},
+    }
+    # Lowest id first so two users following each other at once can't deadlock
+    for user_id in sorted(updates):
+        await db.execute(update(User_Account).where(User_Account.id == user_id).values(**updates[user_id]))
+
+async def toggle_follow(db: AsyncSession, follower: UserPrincipal, target_pseudonym: str):
+    target_user = await db.scalar(select(User_Account).where(User_Account.pseudonym == target_pseudonym))
     if not target_user:
         raise NotFound("Target user not found")
     
     if target_user.id == follower.id:
         raise InvalidSignature("You cannot follow yourself")
     
-    existing_follow = db.query(Follow).filter(
-        Follow.follower_id == follower.id,
-        Follow.followed_id == target_user.id
-    ).first()
-    
-    if existing_follow:
-        db.delete(existing_follow)
-        db.commit()
+    # Conditional statements, so the counters only move for the request that actually changed the row
+    unfollowed = await db.scalar(
+        delete(Follow)
+        .where(Follow.follower_id == follower.id, Follow.followed_id == target_user.id)
+        .returning(Follow.follower_id)
+    )
+    if unfollowed is not None:
+        await _adjust_follow_counts(db, follower.id, target_user.id, -1)
+        await db.commit()
         return SuccessResponse(message=f"Unfollowed {target_pseudonym}", code=status.HTTP_200_OK, data={"is_following": False})
     
-    new_follow = Follow(follower_id=follower.id, followed_id=target_user.id)
-    db.add(new_follow)
-    db.commit()
-    
-    from src.notifications.service import create_notification
-    import asyncio
-    asyncio.create_task(create_notification(
-        db, 
-        recipient_id=target_user.id, 
-        type="follow", 
-        message=f"{follower.pseudonym} followed you", 
+    followed = await db.scalar(
+        dialect_insert(db)(Follow)
+        .values(follower_id=follower.id, followed_id=target_user.id, created_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=["follower_id", "followed_id"])
+        .returning(Follow.follower_id)
+    )
+    if followed is None:
+        # A concurrent request got there first
+        await db.commit()
+        return SuccessResponse(message=f"Followed {target_pseudonym}", code=status.HTTP_200_OK, data={"is_following": True})
+    await _adjust_follow_counts(db, follower.id, target_user.id, 1)
+    await task_queue.enqueue(
+        db, "notification",
+        recipient_id=target_user.id,
+        type="follow",
+        message=f"{follower.pseudonym} followed you",
         sender_id=follower.id
-    ))
+    )
+    await db.commit()
     
     return SuccessResponse(message=f"Followed {target_pseudonym}", code=status.HTTP_201_CREATED, data={"is_following": True})
 
-def get_followers(db: Session, pseudonym: str, current_user: User_Account = None):
-    user = db.query(User_Account).filter(User_Account.pseudonym == pseudonym).first()
+async def _follow_page(db: AsyncSession, filters: list, listed_id, limit: int, cursor=None) -> tuple[list, Optional[str]]:
+    # One query: the listed accounts' ids and pseudonyms, newest follow first
+    query = select(User_Account.id, User_Account.pseudonym, Follow.created_at).join(
+        Follow, listed_id == User_Account.id
+    ).where(*filters).order_by(Follow.created_at.desc(), listed_id.desc())
+    if cursor:
+        query = query.where(tuple_(Follow.created_at, listed_id) < tuple_(*cursor))
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+async def get_followers(db: AsyncSession, pseudonym: str, current_user: UserPrincipal = None, limit: int = 20, cursor=None):
+    user = await db.scalar(select(User_Account).where(User_Account.pseudonym == pseudonym))
     if not user:
         raise NotFound("User not found")
     
-    followers = []
-    for f in user.followers:
-        is_following = False
-        if current_user:
-            is_following = db.query(Follow).filter(
-                Follow.follower_id == current_user.id,
-                Follow.followed_id == f.follower.id
-            ).first() is not None
-        
-        followers.append(UserListResponse(
-            pseudonym=f.follower.pseudonym,
-            is_following=is_following
-        ))
+    rows, next_cursor = await _follow_page(db, [Follow.followed_id == user.id], Follow.follower_id, limit, cursor)
+    viewer_follows = await followed_ids(db, current_user, (row.id for row in rows))
+    
+    followers = [
+        UserListResponse(pseudonym=row.pseudonym, is_following=row.id in viewer_follows)
+        for row in rows
+    ]
     
-    return SuccessResponse(message="Followers fetched", data=followers)
+    return SuccessResponse(message="Followers fetched", data=UserListPage(users=followers, next_cursor=next_cursor))
 
-def get_following(db: Session, pseudonym: str, current_user: User_Account = None):
-    user = db.query(User_Account).filter(User_Account.pseudonym == pseudonym).first()
+async def get_following(db: AsyncSession, pseudonym: str, current_user: UserPrincipal = None, limit: int = 20, cursor=None):
+    user = await db.scalar(select(User_Account).where(User_Account.pseudonym == pseudonym))
     if not user:
         raise NotFound("User not found")
     
-    following = []
-    for f in user.following:
-        is_following = True # They are in the following list
-        # If current_user is different, we check if current_user follows this person
-        if current_user and current_user.id != user.id:
-            is_following = db.query(Follow).filter(
-                Follow.follower_id == current_user.id,
-                Follow.followed_id == f.followed.id
-            ).first() is not None
-            
-        following.append(UserListResponse(
-            pseudonym=f.followed.pseudonym,
-            is_following=is_following
-        ))
+    rows, next_cursor = await _follow_page(db, [Follow.follower_id == user.id], Follow.followed_id, limit, cursor)
+    # Everyone on your own following list is followed; anyone else's list needs a lookup
+    if current_user and current_user.id != user.id:
+        viewer_follows = await followed_ids(db, current_user, (row.id for row in rows))
+    else:
+        viewer_follows = {row.id for row in rows}
+    
+    following = [
+        UserListResponse(pseudonym=row.pseudonym, is_following=row.id in viewer_follows)
+        for row in rows
+    ]
     
-    return SuccessResponse(message="Following list fetched", data=following)
+    return SuccessResponse(message="Following list fetched", data=UserListPage(users=following, next_cursor=next_cursor))
     
-def get_user_profile(db: Session, pseudonym: str, current_user: User_Account = None):
-    user = db.query(User_Account).filter(User_Account.pseudonym == pseudonym).first()
+async def get_user_profile(db: AsyncSession, pseudonym: str, current_user: UserPrincipal = None):
+    user = await db.scalar(select(User_Account).where(User_Account.pseudonym == pseudonym))
     if not user:
         raise NotFound("User not found")
     
     is_following = False
     if current_user:
-        is_following = db.query(Follow).filter(
-            Follow.follower_id == current_user.id,
-            Follow.followed_id == user.id
-        ).first() is not None
+        is_following = await db.get(Follow, (current_user.id, user.id)) is not None
         
-    from src.post.models import Post
     data = {
         "id": user.id,
         "pseudonym": user.pseudonym,
-        "followers_count": len(user.followers),
-        "following_count": len(user.following),
+        "followers_count": user.followers_count,
+        "following_count": user.following_count,
         "is_following": is_following,
-        "posts_count": db.query(Post).filter(Post.user_id == user.id).count()
+        "posts_count": user.posts_count
     }
     return SuccessResponse(message="User profile fetched", data=data)
-    
-    
-    
\ No newline at end of file
+
+# Maintenance helper for src/manage.py and the startup migrations (synchronous engine)
+
+def reconcile_profile_counts(db: Session) -> int:
+    """Recompute the follower, following and post counters on User_Account. Returns the number of users corrected."""
+    from src.post.models import Post
+    followers = select(func.count()).select_from(Follow).where(Follow.followed_id == User_Account.id).scalar_subquery()
+    following = select(func.count()).select_from(Follow).where(Follow.follower_id == User_Account.id).scalar_subquery()
+    posts = select(func.count(Post.id)).where(Post.user_id == User_Account.id).scalar_subquery()
+    result = db.execute(
+        update(User_Account)
+        .where(or_(
+            User_Account.followers_count != followers,
+            User_Account.following_count != following,
+            User_Account.posts_count != posts
+        ))
+        .values(followers_count=followers, following_count=following, posts_count=posts)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
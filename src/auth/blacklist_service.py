@@ -1,25 +1,162 @@
-from typing import Set
+import asyncio
+import hashlib
+import heapq
+import logging
 import time
 import jwt
 from src.config import settings
+from src.core.bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+def token_expiry(token: str) -> float:
+    """The token's exp, read without verification; it only decides how long the entry is kept."""
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        exp = None
+    return float(exp) if exp else time.time() + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+class MemoryTokenBlacklist:
+    """Per-process. Entries are token hashes and disappear once the token would have expired anyway."""
 
-class TokenBlacklist:
     def __init__(self):
-        # In a production environment, use Redis for this.
-        # Format: { (token_hash, expiry_timestamp), ... }
-        self.blacklisted_tokens: Set[str] = set()
+        self.expiries: dict[str, float] = {}
+        # (exp, hash) min-heap so eviction never scans the whole dict
+        self.queue: list[tuple[float, str]] = []
+
+    def _evict(self, now: float):
+        while self.queue and self.queue[0][0] <= now:
+            exp, digest = heapq.heappop(self.queue)
+            if self.expiries.get(digest) == exp:
+                del self.expiries[digest]
 
-    def add(self, token: str):
-        # We can just store the token or its hash.
-        # To keep memory low, we should only store until the token's original expiry.
-        self.blacklisted_tokens.add(token)
+    async def add(self, token: str):
+        exp, now = token_expiry(token), time.time()
+        self._evict(now)
+        if exp > now:
+            digest = token_hash(token)
+            self.expiries[digest] = exp
+            heapq.heappush(self.queue, (exp, digest))
 
-    def is_blacklisted(self, token: str) -> bool:
-        return token in self.blacklisted_tokens
+    async def is_blacklisted(self, token: str) -> bool:
+        exp = self.expiries.get(token_hash(token))
+        return exp is not None and exp > time.time()
 
-    def cleanup(self):
-        # Periodically remove expired tokens from the set
-        # For simplicity in this MVP, we won't implement full cleanup here
+    def start(self):
         pass
 
-blacklist = TokenBlacklist()
+    async def stop(self):
+        pass
+
+class RedisTokenBlacklist:
+    """Shared across workers through one Redis sorted set (member: token hash, score: exp).
+
+    Each worker keeps a Bloom filter of the live entries, so tokens that were never
+    revoked are accepted without a Redis round-trip. Revocations are also appended to
+    a stream; every TOKEN_BLACKLIST_SYNC_SECONDS a worker reads only the entries it has
+    not seen yet, so a token revoked by another worker is rejected here after the next
+    sync. The filter is rebuilt from the sorted set every TOKEN_BLACKLIST_REBUILD_SECONDS,
+    or sooner once it fills up, which is also when expired entries leave it."""
+
+    def __init__(self, url: str, key: str = "ichtaka:revoked_tokens"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("TOKEN_BLACKLIST_BACKEND=redis needs the 'redis' package (install ichtaka[redis])") from e
+        self.client = redis.from_url(url)
+        self.key = key
+        self.stream_key = key + ":log"
+        self.bloom = BloomFilter(1024)
+        # Stream position this worker has read up to; None until the first rebuild
+        self.last_id: str | None = None
+        self.rebuilt_at = 0.0
+        # Revoked here while a rebuild runs; carried into the rebuilt filter
+        self.recent: set[str] = set()
+        self._task: asyncio.Task | None = None
+
+    async def add(self, token: str):
+        exp, now = token_expiry(token), time.time()
+        if exp <= now:
+            return
+        digest = token_hash(token)
+        # Nothing in the stream can matter once every token revoked that long ago has expired
+        oldest_live = int((now - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60) * 1000)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.zadd(self.key, {digest: exp})
+            pipe.zremrangebyscore(self.key, "-inf", now)
+            pipe.xadd(self.stream_key, {"token": digest}, minid=oldest_live, approximate=True)
+            await pipe.execute()
+        self.bloom.add(digest)
+        self.recent.add(digest)
+
+    async def is_blacklisted(self, token: str) -> bool:
+        digest = token_hash(token)
+        if digest not in self.bloom:
+            return False
+        exp = await self.client.zscore(self.key, digest)
+        return exp is not None and exp > time.time()
+
+    async def rebuild(self):
+        """Replace the Bloom filter with one built from the live entries only."""
+        self.recent = set()
+        # Remember the stream position first: anything revoked during the scan is read again by sync()
+        latest = await self.client.xrevrange(self.stream_key, count=1)
+        last_id = latest[0][0] if latest else "0-0"
+        live = await self.client.zrangebyscore(self.key, time.time(), "+inf")
+        # Hashing tens of thousands of members would stall the event loop
+        bloom = await asyncio.to_thread(self._build_filter, live)
+        for digest in self.recent:
+            bloom.add(digest)
+        self.bloom, self.last_id, self.rebuilt_at = bloom, last_id, time.time()
+
+    @staticmethod
+    def _build_filter(live: list) -> BloomFilter:
+        bloom = BloomFilter(max(1024, 2 * len(live)))
+        for digest in live:
+            bloom.add(digest.decode() if isinstance(digest, bytes) else digest)
+        return bloom
+
+    async def sync(self):
+        """Add revocations from other workers since the last sync; rebuild when due."""
+        if (self.last_id is None
+                or time.time() - self.rebuilt_at >= settings.TOKEN_BLACKLIST_REBUILD_SECONDS
+                or self.bloom.count >= self.bloom.capacity):
+            await self.rebuild()
+            return
+        while True:
+            batch = await self.client.xread({self.stream_key: self.last_id}, count=1000)
+            entries = batch[0][1] if batch else []
+            for entry_id, fields in entries:
+                digest = fields.get(b"token") or fields.get("token")
+                self.bloom.add(digest.decode() if isinstance(digest, bytes) else digest)
+                self.last_id = entry_id
+            if len(entries) < 1000:
+                return
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Token blacklist sync failed; keeping the previous filter")
+            await asyncio.sleep(settings.TOKEN_BLACKLIST_SYNC_SECONDS)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+def create_blacklist():
+    if settings.TOKEN_BLACKLIST_BACKEND == "redis":
+        return RedisTokenBlacklist(settings.REDIS_URL)
+    return MemoryTokenBlacklist()
+
+blacklist = create_blacklist()
@@ -0,0 +1,64 @@
+import secrets
+import time
+from collections import OrderedDict
+from typing import Optional
+from src.config import settings
+
+class MemoryChallengeStore:
+    """Per-process, so login and verify must reach the same worker; use the Redis store otherwise."""
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Every entry gets the same TTL, so insertion order is expiry order
+        self.entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def _evict(self, now: float):
+        while self.entries:
+            expires_at, _ = next(iter(self.entries.values()))
+            if expires_at > now and len(self.entries) <= self.max_entries:
+                break
+            self.entries.popitem(last=False)
+
+    async def issue(self, pseudonym: str) -> str:
+        challenge = secrets.token_urlsafe(32)
+        now = time.monotonic()
+        # A new login replaces any outstanding challenge
+        self.entries.pop(pseudonym, None)
+        self.entries[pseudonym] = (now + self.ttl, challenge)
+        self._evict(now)
+        return challenge
+
+    async def take(self, pseudonym: str) -> Optional[str]:
+        """Single use: the challenge is gone after this, whether or not the signature checks out."""
+        entry = self.entries.pop(pseudonym, None)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+class RedisChallengeStore:
+    def __init__(self, url: str, ttl: int, prefix: str = "ichtaka:challenge:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("CHALLENGE_STORE_BACKEND=redis needs the 'redis' package (install ichtaka[redis])") from e
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def issue(self, pseudonym: str) -> str:
+        challenge = secrets.token_urlsafe(32)
+        await self.client.set(self.prefix + pseudonym, challenge, ex=self.ttl)
+        return challenge
+
+    async def take(self, pseudonym: str) -> Optional[str]:
+        # GETDEL is atomic, so two racing verifies can't both consume the same challenge
+        raw = await self.client.getdel(self.prefix + pseudonym)
+        return raw.decode() if isinstance(raw, bytes) else raw
+
+def create_challenge_store():
+    if settings.CHALLENGE_STORE_BACKEND == "redis":
+        return RedisChallengeStore(settings.REDIS_URL, settings.CHALLENGE_TTL_SECONDS)
+    return MemoryChallengeStore(settings.CHALLENGE_TTL_SECONDS, settings.CHALLENGE_STORE_MAX_ENTRIES)
+
+challenge_store = create_challenge_store()
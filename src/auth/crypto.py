@@ -1,11 +1,29 @@
+import asyncio
 import base64
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+from src.config import settings
+
+# Keyed by the stored key string itself, so a replaced key can never hit a stale entry
+@lru_cache(maxsize=settings.PUBLIC_KEY_CACHE_SIZE)
+def load_public_key(public_key_str: str) -> Ed25519PublicKey:
+    return Ed25519PublicKey.from_public_bytes(base64.b64decode(public_key_str))
 
 def verify_ed25519_signature(public_key_str:str, message:str, signature_b64:str) -> bool:
     try:
-        pub = Ed25519PublicKey.from_public_bytes(base64.b64decode(public_key_str))
+        pub = load_public_key(public_key_str)
         signature = base64.b64decode(signature_b64)
         pub.verify(signature, message.encode())
         return True
     except Exception:
-        return False    
\ No newline at end of file
+        return False
+
+# Bounded so a login storm queues here instead of spawning threads
+_verify_executor = ThreadPoolExecutor(max_workers=settings.SIGNATURE_VERIFY_WORKERS, thread_name_prefix="ed25519")
+
+async def verify_ed25519_signature_async(public_key_str: str, message: str, signature_b64: str) -> bool:
+    """verify_ed25519_signature, run off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(
+        _verify_executor, verify_ed25519_signature, public_key_str, message, signature_b64
+    )
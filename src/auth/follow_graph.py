@@ -0,0 +1,15 @@
+from typing import Iterable, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .models import Follow
+from .auth_dependencies import UserPrincipal
+
+async def followed_ids(db: AsyncSession, viewer: Optional[UserPrincipal], user_ids: Iterable[int]) -> set[int]:
+    """Which of user_ids the viewer follows, resolved with one IN query against the follows primary key."""
+    user_ids = set(user_ids)
+    if viewer is None or not user_ids:
+        return set()
+    result = await db.scalars(
+        select(Follow.followed_id).where(Follow.follower_id == viewer.id, Follow.followed_id.in_(user_ids))
+    )
+    return set(result.all())
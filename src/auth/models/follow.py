@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, BigInteger, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, BigInteger, ForeignKey, DateTime, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from src.database import Base
@@ -16,4 +16,7 @@ class Follow(Base):
 
     __table_args__ = (
         UniqueConstraint('follower_id', 'followed_id', name='unique_follow'),
+        # Keyset pagination of followers / following lists, newest first
+        Index("ix_follows_followed_id_created_at", "followed_id", "created_at", "follower_id"),
+        Index("ix_follows_follower_id_created_at", "follower_id", "created_at", "followed_id"),
     )
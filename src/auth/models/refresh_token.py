@@ -1,15 +1,16 @@
 from sqlalchemy import Column, String, DateTime, ForeignKey, BigInteger
 from sqlalchemy.orm import relationship
 from datetime import datetime
-from src.database import Base
+from src.database import Base, BigIntegerPK
 
 class RefreshToken(Base):
     __tablename__ = "refresh_token"
 
-    id = Column(BigInteger, primary_key=True, index=True)
-    user_id = Column(BigInteger, ForeignKey("user_account.id"), nullable=False)
+    id = Column(BigIntegerPK, primary_key=True, index=True)
+    user_id = Column(BigInteger, ForeignKey("user_account.id"), nullable=False, index=True)
     token_hash = Column(String, unique=True, index=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime, nullable=False)
+    # Indexed for the batched purge in src/auth/token_gc.py
+    expires_at = Column(DateTime, nullable=False, index=True)
 
     user = relationship("User_Account", back_populates="refresh_tokens")
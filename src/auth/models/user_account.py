@@ -1,15 +1,19 @@
-from sqlalchemy import Column, String, BigInteger, JSON
-from src.database import Base
+from sqlalchemy import Column, String, JSON, Integer
+from src.database import Base, BigIntegerPK
 
 class User_Account(Base):
     __tablename__ = "user_account"
     
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerPK, primary_key=True, index=True)
     login_id = Column(String, unique=True, index=True, nullable=False)  # system-generated
     public_key = Column(String, nullable=False)  # Ed25519 public key (base64)
-    current_challenge = Column(String, nullable=True)  # Store active challenge for verification
+    current_challenge = Column(String, nullable=True)  # Unused: challenges now live in src/auth/challenge_store.py
     recovery_phrase_hashes = Column(JSON, nullable=False)  # list of 20 hashed words
     pseudonym = Column(String, unique=True, nullable=False)
+    # Maintained by toggle_follow, create_post and delete_post; recompute with `manage reconcile-profile-counts`
+    followers_count = Column(Integer, default=0, server_default="0", nullable=False)
+    following_count = Column(Integer, default=0, server_default="0", nullable=False)
+    posts_count = Column(Integer, default=0, server_default="0", nullable=False)
     
     from sqlalchemy.orm import relationship
     refresh_tokens = relationship("RefreshToken", back_populates="user", cascade="all, delete-orphan")
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import time
+from sqlalchemy import select, func
+from sqlalchemy.engine import Connection
+from src.config import settings
+from src.core.bloom import BloomFilter
+from src.database import async_engine, engine
+from .models import User_Account
+
+logger = logging.getLogger(__name__)
+
+# Ids are assigned on insert but only become visible on commit, so a row can appear
+# after one with a higher id. Each top-up re-reads this many ids below the highest seen.
+REFRESH_OVERLAP_IDS = 1000
+
+class PseudonymFilter:
+    """Bloom filter over every taken pseudonym: a miss means the name is definitely free.
+
+    Built at startup, extended on signup, and topped up from the table every
+    PSEUDONYM_FILTER_REFRESH_SECONDS with rows other workers inserted (accounts
+    are never deleted, so following the id with some overlap is enough). The filter
+    is rebuilt from scratch every PSEUDONYM_FILTER_REBUILD_SECONDS, which bounds how
+    long a transaction slower than the overlap can stay missed. A stale miss only
+    costs the signup a unique-constraint error instead of the pre-check."""
+
+    def __init__(self, error_rate: float):
+        self.error_rate = error_rate
+        self.bloom: BloomFilter | None = None
+        self.capacity = 0
+        self.max_id = 0
+        self.built_at = 0.0
+        self._task: asyncio.Task | None = None
+
+    def might_exist(self, pseudonym: str) -> bool:
+        # Before the first build every name has to go to the database
+        return self.bloom is None or pseudonym in self.bloom
+
+    def add(self, pseudonym: str):
+        # max_id only moves in refresh(): ids below a local signup may still be uncommitted elsewhere
+        if self.bloom is not None and pseudonym not in self.bloom:
+            self.bloom.add(pseudonym)
+
+    def build(self, conn: Connection):
+        """Synchronous; run once at startup through AsyncConnection.run_sync."""
+        count = conn.scalar(select(func.count(User_Account.id)))
+        # Headroom so growth doesn't push the false-positive rate up before the next rebuild
+        capacity = max(2 * count, 100_000)
+        bloom, max_id = BloomFilter(capacity, self.error_rate), 0
+        rows = conn.execute(select(User_Account.id, User_Account.pseudonym)).yield_per(10_000)
+        for user_id, pseudonym in rows:
+            bloom.add(pseudonym)
+            max_id = max(max_id, user_id)
+        self.bloom, self.capacity, self.max_id, self.built_at = bloom, capacity, max_id, time.time()
+        logger.info("Pseudonym filter holds %d names in %d bytes", count, bloom.memory_bytes)
+
+    def _rebuild(self):
+        # On the synchronous engine, so a full scan runs in a thread instead of on the event loop
+        with engine.connect() as conn:
+            self.build(conn)
+
+    async def refresh(self):
+        if (self.bloom is None
+                or self.bloom.count > self.capacity
+                or time.time() - self.built_at >= settings.PSEUDONYM_FILTER_REBUILD_SECONDS):
+            await asyncio.to_thread(self._rebuild)
+            return
+        async with async_engine.connect() as conn:
+            rows = (await conn.execute(
+                select(User_Account.id, User_Account.pseudonym)
+                .where(User_Account.id > self.max_id - REFRESH_OVERLAP_IDS)
+            )).all()
+        for user_id, pseudonym in rows:
+            self.add(pseudonym)
+            self.max_id = max(self.max_id, user_id)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.PSEUDONYM_FILTER_REFRESH_SECONDS)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Pseudonym filter refresh failed; retrying next interval")
+
+    def start(self):
+        if self._task is None and settings.PSEUDONYM_FILTER_REFRESH_SECONDS > 0:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+pseudonym_filter = PseudonymFilter(settings.PSEUDONYM_FILTER_ERROR_RATE)
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from sqlalchemy import select, delete, func
+from sqlalchemy.orm import Session
+from src.config import settings
+from src.database import AsyncSessionLocal
+from .models.refresh_token import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+def expired_batch_statement(batch_size: int):
+    # Chunked through an id subquery so each transaction (and its locks) stays small
+    expired_ids = select(RefreshToken.id).where(RefreshToken.expires_at < datetime.utcnow()).limit(batch_size)
+    return delete(RefreshToken).where(RefreshToken.id.in_(expired_ids.scalar_subquery()))
+
+def purge_expired_refresh_tokens(db: Session, batch_size: int = 1000) -> int:
+    """Synchronous variant for src/manage.py. Returns the number of rows deleted."""
+    deleted = 0
+    while True:
+        removed = db.execute(expired_batch_statement(batch_size)).rowcount
+        db.commit()
+        deleted += removed
+        if removed < batch_size:
+            return deleted
+
+class RefreshTokenPurger:
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_run_at: float | None = None
+        self.last_deleted = 0
+        self.total_deleted = 0
+        self._task: asyncio.Task | None = None
+
+    async def purge(self) -> int:
+        deleted = 0
+        async with AsyncSessionLocal() as db:
+            while True:
+                removed = (await db.execute(expired_batch_statement(self.batch_size))).rowcount
+                await db.commit()
+                deleted += removed
+                if removed < self.batch_size:
+                    break
+                # Let request traffic in between batches
+                await asyncio.sleep(0)
+        self.last_run_at, self.last_deleted = time.time(), deleted
+        self.total_deleted += deleted
+        return deleted
+
+    async def stats(self) -> dict:
+        async with AsyncSessionLocal() as db:
+            rows = await db.scalar(select(func.count(RefreshToken.id)))
+            expired = await db.scalar(
+                select(func.count(RefreshToken.id)).where(RefreshToken.expires_at < datetime.utcnow())
+            )
+        return {
+            "rows": rows,
+            "expired": expired,
+            "last_purge_at": self.last_run_at,
+            "last_purge_deleted": self.last_deleted,
+            "total_purged": self.total_deleted,
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                deleted = await self.purge()
+                if deleted:
+                    logger.info("Purged %d expired refresh tokens", deleted)
+            except Exception:
+                logger.exception("Refresh token purge failed; retrying next interval")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+refresh_token_purger = RefreshTokenPurger(
+    settings.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS,
+    settings.REFRESH_TOKEN_PURGE_BATCH_SIZE
+)
@@ -14,12 +14,73 @@ class Settings(BaseSettings):
     
     # Database Settings
     DATABASE_URL: str 
+    # Connection pool, per worker process (ignored for SQLite)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
     
+    # Cache Settings. "redis" shares entries across workers (pip install ichtaka[redis]). With "memory"
+    # each worker invalidates only its own feed pages, so other workers can serve a stale feed for up to
+    # FEED_CACHE_TTL_SECONDS after a write: use "redis" when running more than one worker
+    CACHE_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_MAX_ENTRIES: int = 1024
+    # 0 disables the feed cache
+    FEED_CACHE_TTL_SECONDS: int = 15
+    
+    # Buffer vote counter updates in memory and flush them in batches (post_votes stays authoritative)
+    VOTE_WRITE_BEHIND: bool = False
+    VOTE_FLUSH_INTERVAL_SECONDS: float = 2.0
+
+    # Trending scores halve every TRENDING_HALF_LIFE_HOURS without new activity. Changing it
+    # needs `manage rebuild-trending-scores`, since stored scores are scaled by it
+    TRENDING_HALF_LIFE_HOURS: float = 24.0
+
+    # Post search backend. "memory" serves queries from an in-process inverted index instead of
+    # PostgreSQL full-text search / SQLite FTS5; writes from other workers only show up after a restart
+    SEARCH_BACKEND: str = "database"
+    # Where the in-memory index snapshots itself for fast restarts; unset disables snapshots
+    SEARCH_INDEX_SNAPSHOT: str | None = None
+    
+    # Background tasks (notifications) go through the task_outbox table. Each worker process claims up to
+    # TASK_BUFFER_SIZE of them at a time and runs them on TASK_WORKERS coroutines, retrying failures with backoff
+    TASK_WORKERS: int = 4
+    TASK_BUFFER_SIZE: int = 100
+    TASK_POLL_INTERVAL_SECONDS: float = 1.0
+    TASK_MAX_ATTEMPTS: int = 5
+    TASK_TIMEOUT_SECONDS: int = 30
+
     # Security Settings
     JWT_SECRET_KEY: str 
     JWT_ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Expired refresh tokens are deleted in batches every interval (0 disables; see `manage purge-refresh-tokens`)
+    REFRESH_TOKEN_PURGE_INTERVAL_SECONDS: int = 3600
+    REFRESH_TOKEN_PURGE_BATCH_SIZE: int = 1000
+    # Authenticated principals are cached per worker for up to this long (never past the token's exp)
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    # Login signature checks: parsed Ed25519 keys kept in an LRU, verification on a bounded thread pool
+    PUBLIC_KEY_CACHE_SIZE: int = 4096
+    SIGNATURE_VERIFY_WORKERS: int = 4
+    # Login challenges. "memory" only works when login and verify hit the same worker; use "redis" otherwise
+    CHALLENGE_STORE_BACKEND: str = "memory"
+    CHALLENGE_TTL_SECONDS: int = 300
+    CHALLENGE_STORE_MAX_ENTRIES: int = 100000
+    # Bloom filter behind check-username/signup; picks up other workers' signups every refresh (0 disables)
+    # and is rebuilt from the table every PSEUDONYM_FILTER_REBUILD_SECONDS
+    PSEUDONYM_FILTER_ERROR_RATE: float = 0.001
+    PSEUDONYM_FILTER_REFRESH_SECONDS: float = 5.0
+    PSEUDONYM_FILTER_REBUILD_SECONDS: float = 3600.0
+    # Revoked access tokens. "redis" shares them across workers (pip install ichtaka[redis]); each worker
+    # adds new revocations to its local Bloom filter every TOKEN_BLACKLIST_SYNC_SECONDS and rebuilds the
+    # filter from scratch (dropping expired ones) every TOKEN_BLACKLIST_REBUILD_SECONDS
+    TOKEN_BLACKLIST_BACKEND: str = "memory"
+    TOKEN_BLACKLIST_SYNC_SECONDS: float = 1.0
+    TOKEN_BLACKLIST_REBUILD_SECONDS: float = 3600.0
     
     # CORS Settings
     CORS_ORIGINS: list[str] = [
@@ -33,4 +94,7 @@ class Settings(BaseSettings):
     AGENT_URL: str
     AGENT_API_KEY: str
     
+    # Internal endpoints (/v1/internal) are disabled unless this is set
+    INTERNAL_API_KEY: str | None = None
+    
 settings = Settings()
\ No newline at end of file
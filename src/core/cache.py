@@ -0,0 +1,76 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from src.config import settings
+
+class MemoryCache:
+    """Per-process LRU with a TTL per entry. Values are stored as-is, so callers must not mutate them."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        # Counters are kept apart so LRU pressure can never reset a version number
+        self.counters: dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int):
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        self.entries.pop(key, None)
+
+    async def get_counter(self, key: str) -> int:
+        return self.counters.get(key, 0)
+
+    async def incr(self, key: str) -> int:
+        self.counters[key] = self.counters.get(key, 0) + 1
+        return self.counters[key]
+
+class RedisCache:
+    """Shared across workers. Values round-trip through JSON."""
+
+    def __init__(self, url: str, prefix: str = "ichtaka:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis needs the 'redis' package (install ichtaka[redis])") from e
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: int):
+        await self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    async def delete(self, key: str):
+        await self.client.delete(self.prefix + key)
+
+    async def get_counter(self, key: str) -> int:
+        raw = await self.client.get(self.prefix + key)
+        return int(raw) if raw is not None else 0
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(self.prefix + key)
+
+def create_cache():
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCache(settings.REDIS_URL)
+    return MemoryCache(settings.CACHE_MAX_ENTRIES)
+
+cache = create_cache()
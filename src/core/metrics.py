@@ -0,0 +1,68 @@
+import bisect
+import math
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+class Histogram:
+    """Cumulative histogram with fixed upper bounds, Prometheus style."""
+
+    def __init__(self, buckets: list[float]):
+        self.buckets = sorted(buckets) + [math.inf]
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            cumulative["+Inf" if bound == math.inf else str(bound)] = running
+        return {"count": self.count, "sum": round(self.sum, 6), "buckets": cumulative}
+
+class PoolMetrics:
+    def __init__(self):
+        # Seconds spent waiting for a connection to become available
+        self.wait_seconds = Histogram([0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10])
+        self.checkouts = 0
+        self.timeouts = 0
+
+    def snapshot(self, pool) -> dict:
+        data = {
+            "pool_class": type(pool).__name__,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds": self.wait_seconds.snapshot(),
+        }
+        # Only queue pools track size and overflow
+        if hasattr(pool, "checkedout"):
+            data.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "timeout": pool.timeout(),
+            })
+        return data
+
+pool_metrics = PoolMetrics()
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Records how long each checkout waited, including the ones that timed out."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.timeouts += 1
+            raise
+        finally:
+            pool_metrics.wait_seconds.observe(time.perf_counter() - start)
+        pool_metrics.checkouts += 1
+        return conn
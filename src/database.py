@@ -1,17 +1,58 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, BigInteger, Integer
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from src.config import settings
+from src.core.metrics import InstrumentedAsyncPool
 
 SQL_ALCHEMY_DATABASE_URL = settings.DATABASE_URL
-engine = create_engine(SQL_ALCHEMY_DATABASE_URL)
+
+# Async drivers for each backend we run on: asyncpg in production, aiosqlite for tests
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str):
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername))
+
+def pool_options(url: str) -> dict:
+    # SQLite picks its own pool and rejects sizing arguments
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncPool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+# Request handlers use the async engine. The sync engine only serves the
+# maintenance commands in src/manage.py and full scans that run in a thread
+# (the pseudonym filter rebuild).
+async_engine = create_async_engine(to_async_url(SQL_ALCHEMY_DATABASE_URL), **pool_options(SQL_ALCHEMY_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+engine = create_engine(SQL_ALCHEMY_DATABASE_URL, pool_pre_ping=settings.DB_POOL_PRE_PING)
 SessionLocal = sessionmaker(autoflush=False, bind=engine)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+# SQLite only autoincrements INTEGER PRIMARY KEY columns
+BigIntegerPK = BigInteger().with_variant(Integer, "sqlite")
+
+def dialect_insert(db: AsyncSession):
+    """INSERT construct with ON CONFLICT support for the session's backend."""
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
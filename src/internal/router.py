@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, Security
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from src.config import settings
+from src.auth.token_gc import refresh_token_purger
+from src.core.metrics import pool_metrics
+from src.core.utils.response import SuccessResponse
+from src.database import async_engine
+from src.tasks.queue import task_queue
+
+router = APIRouter()
+security = HTTPBearer()
+
+def verify_internal_api_key(credentials: HTTPAuthorizationCredentials = Security(security)):
+    if not settings.INTERNAL_API_KEY or credentials.credentials != settings.INTERNAL_API_KEY:
+        raise HTTPException(status_code=403, detail="Invalid internal API key")
+    return credentials.credentials
+
+@router.get("/pool")
+async def pool_stats(api_key: str = Depends(verify_internal_api_key)):
+    return SuccessResponse(
+        message="Pool stats fetched",
+        data=pool_metrics.snapshot(async_engine.pool)
+    )
+
+@router.get("/refresh-tokens")
+async def refresh_token_stats(api_key: str = Depends(verify_internal_api_key)):
+    return SuccessResponse(
+        message="Refresh token stats fetched",
+        data=await refresh_token_purger.stats()
+    )
+
+@router.get("/tasks")
+async def task_stats(api_key: str = Depends(verify_internal_api_key)):
+    return SuccessResponse(
+        message="Task queue stats fetched",
+        data=await task_queue.stats()
+    )
@@ -0,0 +1,82 @@
+import argparse
+from src.database import SessionLocal
+
+# Import all models so relationships resolve outside the web app
+from src.auth.models import User_Account
+from src.post.models import Post
+from src.post_actions.models import Comment, Vote
+from src.notifications.models import Notification
+
+def reconcile_comment_counts():
+    from src.post_actions.service import reconcile_comment_counts as reconcile
+    db = SessionLocal()
+    try:
+        fixed = reconcile(db)
+    finally:
+        db.close()
+    print(f"Corrected comments_count on {fixed} post(s)")
+
+def reconcile_vote_counts():
+    from src.post_actions.service import reconcile_vote_counts as reconcile
+    db = SessionLocal()
+    try:
+        fixed = reconcile(db)
+    finally:
+        db.close()
+    print(f"Corrected vote counters on {fixed} post(s)")
+
+def backfill_comment_paths():
+    from src.post_actions.service import backfill_comment_paths as backfill
+    db = SessionLocal()
+    try:
+        fixed = backfill(db)
+    finally:
+        db.close()
+    print(f"Corrected path/depth on {fixed} comment(s)")
+
+def reconcile_profile_counts():
+    from src.auth.auth_service import reconcile_profile_counts as reconcile
+    db = SessionLocal()
+    try:
+        fixed = reconcile(db)
+    finally:
+        db.close()
+    print(f"Corrected profile counters on {fixed} user(s)")
+
+def purge_refresh_tokens():
+    from src.auth.token_gc import purge_expired_refresh_tokens
+    from src.config import settings
+    db = SessionLocal()
+    try:
+        deleted = purge_expired_refresh_tokens(db, settings.REFRESH_TOKEN_PURGE_BATCH_SIZE)
+    finally:
+        db.close()
+    print(f"Deleted {deleted} expired refresh token(s)")
+
+def rebuild_trending_scores():
+    from src.post.trending import rebuild_trending_scores as rebuild
+    db = SessionLocal()
+    try:
+        scored = rebuild(db)
+    finally:
+        db.close()
+    print(f"Rebuilt trending scores; {scored} post(s) have recent activity")
+
+COMMANDS = {
+    "reconcile-comment-counts": reconcile_comment_counts,
+    "reconcile-vote-counts": reconcile_vote_counts,
+    "reconcile-profile-counts": reconcile_profile_counts,
+    "purge-refresh-tokens": purge_refresh_tokens,
+    "backfill-comment-paths": backfill_comment_paths,
+    "rebuild-trending-scores": rebuild_trending_scores,
+}
+
+def main():
+    """Launched with `uv run manage <command>` at root level"""
+    parser = argparse.ArgumentParser(prog="manage", description="Ichtaka maintenance commands")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    COMMANDS[args.command]()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn
+from src.database import Base
+from src.search.fulltext import ensure_post_search_index
+
+def add_missing_columns(conn: Connection) -> set[tuple[str, str]]:
+    # create_all never alters existing tables. New columns must be nullable or
+    # carry a server_default for this to work on a populated table.
+    inspector = inspect(conn)
+    added = set()
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_ddl = CreateColumn(column).compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"))
+            added.add((table.name, column.name))
+    return added
+
+def create_missing_indexes(conn: Connection):
+    # create_all only builds indexes for brand new tables, so pick up any index
+    # added to an existing model here.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+def backfill_comments_count(db: Session):
+    from src.post_actions.service import reconcile_comment_counts
+    reconcile_comment_counts(db)
+
+def backfill_comment_paths(db: Session):
+    from src.post_actions.service import backfill_comment_paths as backfill
+    backfill(db)
+
+def backfill_trending_scores(db: Session):
+    from src.post.trending import rebuild_trending_scores
+    rebuild_trending_scores(db)
+
+def backfill_profile_counts(db: Session):
+    from src.auth.auth_service import reconcile_profile_counts
+    reconcile_profile_counts(db)
+
+# Run once, right after the column they fill has been added
+BACKFILLS = {
+    ("posts", "comments_count"): backfill_comments_count,
+    ("post_comments", "path"): backfill_comment_paths,
+    ("posts", "trending_score"): backfill_trending_scores,
+    ("user_account", "followers_count"): backfill_profile_counts,
+}
+
+def run_migrations(conn: Connection):
+    """Bring an existing database in line with the models. Every step must be idempotent.
+
+    Synchronous on purpose: call it through AsyncConnection.run_sync."""
+    added = add_missing_columns(conn)
+    create_missing_indexes(conn)
+    ensure_post_search_index(conn)
+    for key, backfill in BACKFILLS.items():
+        if key in added:
+            backfill(Session(bind=conn))
@@ -2,7 +2,7 @@ from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
-from src.database import Base
+from src.database import Base, BigIntegerPK
 
 class NotificationType(str, enum.Enum):
     LIKE = "like"
@@ -13,7 +13,7 @@ class NotificationType(str, enum.Enum):
 class Notification(Base):
     __tablename__ = "notifications"
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerPK, primary_key=True, index=True)
     recipient_id = Column(BigInteger, ForeignKey("user_account.id"), nullable=False)
     sender_id = Column(BigInteger, ForeignKey("user_account.id"), nullable=True)
     type = Column(String, nullable=False) # Store NotificationType value
@@ -1,5 +1,4 @@
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
 from typing import List
 from . import service, schemas
 from src.auth.auth_dependencies import DB_SESSION, CURRENT_USER
@@ -13,7 +12,7 @@ async def get_notifications(
     db: DB_SESSION,
     user: CURRENT_USER
 ):
-    notifications = service.get_notifications(db, user.id)
+    notifications = await service.get_notifications(db, user.id)
     # Convert to response schema
     resp_data = []
     for n in notifications:
@@ -29,7 +28,7 @@ async def mark_as_read(
     db: DB_SESSION,
     user: CURRENT_USER
 ):
-    success = service.mark_as_read(db, id, user.id)
+    success = await service.mark_as_read(db, id, user.id)
     return SuccessResponse(message="Notification marked as read", data=success)
 
 @router.post("/read-all", response_model=APIResponse[bool])
@@ -37,5 +36,5 @@ async def mark_all_as_read(
     db: DB_SESSION,
     user: CURRENT_USER
 ):
-    success = service.mark_all_as_read(db, user.id)
+    success = await service.mark_all_as_read(db, user.id)
     return SuccessResponse(message="All notifications marked as read", data=success)
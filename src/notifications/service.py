@@ -1,32 +1,39 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from .models import Notification, NotificationType
 from .schemas import NotificationCreate
 from src.core.websocket_manager import manager
-from src.auth.models import User_Account
+from src.auth.models import User_Account, Follow
+from src.database import AsyncSessionLocal
+from src.tasks.queue import task_queue
+from src.utils.encoding import encode_cursor, decode_cursor
 
+@task_queue.handler("notification")
 async def create_notification(
-    db: Session, 
-    recipient_id: int, 
-    type: str, 
-    message: str, 
-    sender_id: int = None, 
+    recipient_id: int,
+    type: str,
+    message: str,
+    sender_id: int = None,
     post_id: str = None
 ):
-    # Save to DB
-    new_notif = Notification(
-        recipient_id=recipient_id,
-        sender_id=sender_id,
-        type=type,
-        message=message,
-        post_id=post_id
-    )
-    db.add(new_notif)
-    db.commit()
-    db.refresh(new_notif)
-    
-    # Notify via WebSocket
-    sender = db.query(User_Account).filter(User_Account.id == sender_id).first() if sender_id else None
-    
+    # Runs on the task queue after the request's session is gone, so it opens its own
+    async with AsyncSessionLocal() as db:
+        # Save to DB
+        new_notif = Notification(
+            recipient_id=recipient_id,
+            sender_id=sender_id,
+            type=type,
+            message=message,
+            post_id=post_id
+        )
+        db.add(new_notif)
+        await db.commit()
+        await db.refresh(new_notif)
+
+        # Notify via WebSocket
+        sender = await db.get(User_Account, sender_id) if sender_id else None
+
     payload = {
         "type": "notification",
         "data": {
@@ -42,18 +49,57 @@ async def create_notification(
     await manager.send_personal_message(payload, recipient_id)
     return new_notif
 
-def get_notifications(db: Session, user_id: int, limit: int = 50):
-    return db.query(Notification).filter(Notification.recipient_id == user_id).order_by(Notification.created_at.desc()).limit(limit).all()
+# Followers handled per notify_followers task; the rest go to a follow-up task
+FANOUT_BATCH_SIZE = 500
+
+@task_queue.handler("notify_followers")
+async def notify_followers(author_id: int, message: str, post_id: str = None, cursor: str = None):
+    # One task per follower, so a failed delivery is retried on its own. A batch and the task for
+    # the next one commit together, so a retry never repeats or skips followers.
+    async with AsyncSessionLocal() as db:
+        # Keyset walk over the (followed_id, created_at, follower_id) index
+        query = select(Follow.follower_id, Follow.created_at).where(Follow.followed_id == author_id)
+        if cursor:
+            query = query.where(tuple_(Follow.created_at, Follow.follower_id) > tuple_(*decode_cursor(cursor)))
+        rows = (await db.execute(
+            query.order_by(Follow.created_at, Follow.follower_id).limit(FANOUT_BATCH_SIZE)
+        )).all()
+        for follower_id, _ in rows:
+            await task_queue.enqueue(
+                db, "notification",
+                recipient_id=follower_id,
+                type="new_post",
+                message=message,
+                sender_id=author_id,
+                post_id=post_id
+            )
+        if len(rows) == FANOUT_BATCH_SIZE:
+            await task_queue.enqueue(
+                db, "notify_followers",
+                author_id=author_id, message=message, post_id=post_id,
+                cursor=encode_cursor(rows[-1].created_at, rows[-1].follower_id)
+            )
+        await db.commit()
+
+async def get_notifications(db: AsyncSession, user_id: int, limit: int = 50):
+    result = await db.scalars(
+        select(Notification)
+        .options(selectinload(Notification.sender))
+        .where(Notification.recipient_id == user_id)
+        .order_by(Notification.created_at.desc())
+        .limit(limit)
+    )
+    return result.all()
 
-def mark_as_read(db: Session, notif_id: int, user_id: int):
-    notif = db.query(Notification).filter(Notification.id == notif_id, Notification.recipient_id == user_id).first()
+async def mark_as_read(db: AsyncSession, notif_id: int, user_id: int):
+    notif = await db.scalar(select(Notification).where(Notification.id == notif_id, Notification.recipient_id == user_id))
     if notif:
         notif.is_read = True
-        db.commit()
+        await db.commit()
         return True
     return False
 
-def mark_all_as_read(db: Session, user_id: int):
-    db.query(Notification).filter(Notification.recipient_id == user_id, Notification.is_read == False).update({"is_read": True})
-    db.commit()
+async def mark_all_as_read(db: AsyncSession, user_id: int):
+    await db.execute(update(Notification).where(Notification.recipient_id == user_id, Notification.is_read == False).values(is_read=True))
+    await db.commit()
     return True
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, BigInteger, JSON, ForeignKey, Enum, DateTime, Text, Integer
+from sqlalchemy import Column, String, BigInteger, JSON, ForeignKey, Enum, DateTime, Text, Integer, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from src.database import Base
+from src.database import Base, BigIntegerPK
 from datetime import datetime
 import enum
 
@@ -17,7 +17,7 @@ class PostStatus(str, enum.Enum):
 class Post(Base):
     __tablename__ = "posts"
     
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerPK, primary_key=True, index=True)
     user_id = Column(BigInteger, ForeignKey("user_account.id"), nullable=True)
     
     title = Column(String(255), nullable=False)
@@ -34,11 +34,23 @@ class Post(Base):
     
     upvotes_count = Column(Integer, default=0, nullable=False)
     downvotes_count = Column(Integer, default=0, nullable=False)
+    # Maintained by add_comment; recompute with `manage reconcile-comment-counts`
+    comments_count = Column(Integer, default=0, server_default="0", nullable=False)
+    # Log-scale activity score anchored at the unix epoch; see src/post/trending.py
+    trending_score = Column(Float, default=0.0, server_default="0", nullable=False)
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     author = relationship("User_Account", backref="posts")
-    comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan", lazy="selectin")
+    comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan")
     votes = relationship("Vote", back_populates="post", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Keyset pagination of the feed walks (created_at, id) descending
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_user_id_created_at", "user_id", "created_at"),
+        # Trending is a backwards range read of this index
+        Index("ix_posts_trending_score_id", "trending_score", "id"),
+    )
@@ -1,11 +1,10 @@
 from fastapi import APIRouter, Depends, Query, status, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 from typing import List, Optional
 from . import service, schemas, models
-from src.auth.auth_dependencies import DB_SESSION, get_current_user, CURRENT_USER, get_optional_current_user
-from src.auth.models.user_account import User_Account
+from src.auth.auth_dependencies import DB_SESSION, get_current_user, CURRENT_USER, get_optional_current_user, UserPrincipal
 from src.core.schemas import APIResponse
-from src.utils.encoding import decode_ids
+from src.utils.encoding import decode_ids, decode_cursor
 
 router = APIRouter()
 
@@ -15,11 +14,13 @@ def get_valid_post_id(id: str) -> int:
     except (ValueError, KeyError):
         raise HTTPException(status_code=400, detail="Invalid post ID format")
 
-def enrich_comment(comment_obj, comment_schema):
-    if comment_obj.author:
-        comment_schema.pseudonym = comment_obj.author.pseudonym
-    for sub_obj, sub_schema in zip(comment_obj.replies, comment_schema.replies):
-        enrich_comment(sub_obj, sub_schema)
+def get_valid_cursor(cursor: Optional[str]):
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor format")
 
 @router.post("/", response_model=APIResponse[schemas.PostResponse], status_code=status.HTTP_201_CREATED)
 async def create_post(
@@ -33,41 +34,41 @@ async def create_post(
 @router.get("/", response_model=APIResponse[schemas.FeedResponse])
 async def get_feed(
     db: DB_SESSION,
-    user: Optional[User_Account] = Depends(get_optional_current_user), # Use dependency directly or define alias in router
+    user: Optional[UserPrincipal] = Depends(get_optional_current_user), # Use dependency directly or define alias in router
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
-    pseudonym: Optional[str] = Query(None)
+    pseudonym: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from the previous page; switches to keyset pagination"),
+    include_total: Optional[bool] = Query(None, description="Count matching posts. Defaults to true for page mode and false for cursor mode")
 ):
-    return service.get_feed(db, page, limit, user, pseudonym)
+    return await service.get_feed(db, page, limit, user, pseudonym, get_valid_cursor(cursor), include_total)
 
 @router.get("/{id}", response_model=APIResponse[schemas.PostResponse])
 async def get_post(
     id: str,
     db: DB_SESSION,
-    user: Optional[User_Account] = Depends(get_optional_current_user)
+    user: Optional[UserPrincipal] = Depends(get_optional_current_user)
 ):
     post_id = get_valid_post_id(id)
-    post = service.get_post(db, post_id)
+    post = await service.get_post(db, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
         
-    resp = schemas.PostResponse.from_attributes(post)
+    resp = schemas.PostResponse.model_validate(post)
     if post.author:
             resp.pseudonym = post.author.pseudonym
     
     # Check for user vote
     if user:
         from src.post_actions.models import Vote
-        vote = db.query(Vote).filter(Vote.post_id == post.id, Vote.user_id == user.id).first()
+        vote = await db.scalar(select(Vote).where(Vote.post_id == post.id, Vote.user_id == user.id))
         if vote:
             resp.user_vote_status = vote.vote_type.value
             
-    root_comments_objs = [c for c in post.comments if c.parent_id is None]
-    from src.post_actions.schemas import CommentResponse
-    resp.comments = [CommentResponse.model_validate(c) for c in root_comments_objs]
-    
-    for c_obj, c_schema in zip(root_comments_objs, resp.comments):
-        enrich_comment(c_obj, c_schema)
+    from src.post_actions.service import get_comments
+    first_page = await get_comments(db, post.id)
+    resp.comments = first_page.comments
+    resp.comments_next_cursor = first_page.next_cursor
         
     return {"message": "Post fetched successfully", "code": 200, "data": resp}
 
@@ -84,7 +85,7 @@ async def update_post(
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
         
-    resp = schemas.PostResponse.from_attributes(post)
+    resp = schemas.PostResponse.model_validate(post)
     if post.author:
         resp.pseudonym = post.author.pseudonym
     return {"message": "Post updated successfully", "code": 200, "data": resp}
@@ -36,8 +36,10 @@ class PostResponse(PostBase):
     comments_count: int = 0
     created_at: datetime
     updated_at: datetime
-    # Comments will be handled by PostActions schemas or a separate inclusion
-    comments: List[Any] = []
+    # Comments will be handled by PostActions schemas or a separate inclusion.
+    # The alias keeps model_validate from touching (and lazy-loading) Post.comments.
+    comments: List[Any] = Field(default=[], validation_alias="comment_tree")
+    comments_next_cursor: Optional[str] = None
     user_vote_status: Optional[str] = "none"
 
     class Config:
@@ -49,7 +51,8 @@ class PostResponse(PostBase):
 
 class FeedResponse(BaseModel):
     posts: List[PostResponse]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     limit: int
-    totalPages:int
+    totalPages: Optional[int] = None
+    next_cursor: Optional[str] = None
@@ -1,16 +1,24 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from fastapi import status
 from .models import Post, PostStatus
 from .schemas import PostCreate, PostUpdate, PostResponse, FeedResponse
-from src.auth.models.user_account import User_Account
+from src.auth.models import User_Account
+from src.auth.auth_dependencies import UserPrincipal
 from src.core.websocket_manager import manager
+from src.core.cache import cache
+from src.search.inverted_index import post_index
+from src.config import settings
+from fastapi.encoders import jsonable_encoder
 from src.core.utils.response import SuccessResponse
-from src.notifications.service import create_notification
-from src.utils.encoding import encode_ids
-import asyncio
+from src.tasks.queue import task_queue
+from src.utils.encoding import encode_ids, encode_cursor
+from datetime import datetime
+from typing import Optional
 import math
 
-async def create_post(db: Session, user: User_Account, data: PostCreate) -> SuccessResponse :
+async def create_post(db: AsyncSession, user: UserPrincipal, data: PostCreate) -> SuccessResponse :
     new_post = Post(
         user_id=user.id if user else None,
         title=data.title,
@@ -22,8 +30,21 @@ async def create_post(db: Session, user: User_Account, data: PostCreate) -> Succ
         severity=data.severity
     )
     db.add(new_post)
-    db.commit()
-    db.refresh(new_post)
+    if user:
+        await db.execute(update(User_Account).where(User_Account.id == user.id).values(posts_count=User_Account.posts_count + 1))
+        # Committed with the post; a background task fans it out to the followers
+        await db.flush()
+        await task_queue.enqueue(
+            db, "notify_followers",
+            author_id=user.id,
+            message=f"{user.pseudonym} just posted: {new_post.title[:30]}...",
+            post_id=encode_ids(new_post.id)
+        )
+    await db.commit()
+    await db.refresh(new_post)
+    await invalidate_feed_cache()
+    if post_index:
+        post_index.add(new_post.id, new_post.title, new_post.description)
     
     # Broadcast new post
     await manager.broadcast({
@@ -36,18 +57,6 @@ async def create_post(db: Session, user: User_Account, data: PostCreate) -> Succ
         }
     })
     
-    # Notify followers
-    if user:
-        for f in user.followers:
-            asyncio.create_task(create_notification(
-                db,
-                recipient_id=f.follower_id,
-                type="new_post",
-                message=f"{user.pseudonym} just posted: {new_post.title[:30]}...",
-                sender_id=user.id,
-                post_id=encode_ids(new_post.id)
-            ))
-    
     resp = PostResponse.model_validate(new_post)
     resp.pseudonym = user.pseudonym
     
@@ -80,59 +89,112 @@ async def create_post(db: Session, user: User_Account, data: PostCreate) -> Succ
     
 
 
-def enrich_comment(comment_obj, comment_schema):
-    if comment_obj.author:
-        comment_schema.pseudonym = comment_obj.author.pseudonym
-    for sub_obj, sub_schema in zip(comment_obj.replies, comment_schema.replies):
-        enrich_comment(sub_obj, sub_schema)
+FEED_VERSION_KEY = "feed:version"
 
-def get_feed(db: Session, page: int = 1, limit: int = 10, user: User_Account = None, pseudonym: str = None):
-    query = db.query(Post)
+async def invalidate_feed_cache():
+    # Bumping the version orphans every cached page at once; they age out by TTL. The version
+    # lives in the cache backend, so with CACHE_BACKEND=memory only this worker's pages are
+    # orphaned and other workers keep serving theirs for up to FEED_CACHE_TTL_SECONDS.
+    await cache.incr(FEED_VERSION_KEY)
+
+async def _build_feed_page(
+    db: AsyncSession,
+    page: int,
+    limit: int,
+    pseudonym: Optional[str],
+    cursor: Optional[tuple[datetime, int]],
+    include_total: bool
+) -> dict:
+    query = select(Post)
     
     if pseudonym:
-        query = query.join(User_Account).filter(User_Account.pseudonym == pseudonym)
+        query = query.join(User_Account).where(User_Account.pseudonym == pseudonym)
     
     # For admins copy this line
     # if status_filter:
-    #     query = query.filter(Post.status == status_filter)
+    #     query = query.where(Post.status == status_filter)
     
-    # query = query.filter(Post.status == PostStatus.CONFIRMED)
+    # query = query.where(Post.status == PostStatus.CONFIRMED)
     
-    total = query.count()
-    posts = query.order_by(Post.created_at.desc()).offset((page - 1) * limit).limit(limit).all()
+    total = await db.scalar(select(func.count()).select_from(query.subquery())) if include_total else None
     
-    # Batch fetch votes if user is logged in
-    user_votes_map = {}
-    if user:
-        from src.post_actions.models import Vote
-        post_ids = [p.id for p in posts]
-        votes = db.query(Vote).filter(
-            Vote.post_id.in_(post_ids),
-            Vote.user_id == user.id
-        ).all()
-        user_votes_map = {v.post_id: v.vote_type.value for v in votes}
+    ordered = query.options(joinedload(Post.author)).order_by(Post.created_at.desc(), Post.id.desc())
+    if cursor:
+        cursor_created_at, cursor_id = cursor
+        ordered = ordered.where(tuple_(Post.created_at, Post.id) < tuple_(cursor_created_at, cursor_id))
+    else:
+        ordered = ordered.offset((page - 1) * limit)
+    posts = (await db.scalars(ordered.limit(limit + 1))).all()
+    
+    # The extra row only tells us whether another page exists
+    has_more = len(posts) > limit
+    posts = posts[:limit]
+    next_cursor = encode_cursor(posts[-1].created_at, posts[-1].id) if has_more else None
     
     post_responses = []
     for p in posts:
         resp = PostResponse.model_validate(p)
         if p.author:
             resp.pseudonym = p.author.pseudonym
-        
-        # Set user vote status
-        resp.user_vote_status = user_votes_map.get(p.id, "none")
-            
-        # Lazy loading comments: just count them
-        resp.comments_count = len(p.comments) # This uses the relationship, might trigger load if not careful, but usually acceptable for small sets or joined query. 
-        # Ideally using a count query is better for performance but this is a start.
-        # Actually p.comments might be lazy loaded. 
-        # Let's clean comments list to avoid huge payload
-        resp.comments = []
-        
-        # for c_obj, c_schema in zip(root_comments_objs, resp.comments):
-        #    enrich_comment(c_obj, c_schema)
-            
         post_responses.append(resp)
-    data = FeedResponse(posts=post_responses, total=total, page=page, limit=limit, totalPages=math.ceil(total/limit))
+    data = FeedResponse(
+        posts=post_responses,
+        total=total,
+        page=None if cursor else page,
+        limit=limit,
+        totalPages=math.ceil(total/limit) if total is not None else None,
+        next_cursor=next_cursor
+    )
+    # Serialized without any per-user state so one entry serves every viewer
+    return {"post_ids": [p.id for p in posts], "data": jsonable_encoder(data)}
+
+async def get_feed(
+    db: AsyncSession,
+    page: int = 1,
+    limit: int = 10,
+    user: UserPrincipal = None,
+    pseudonym: str = None,
+    cursor: Optional[tuple[datetime, int]] = None,
+    include_total: Optional[bool] = None
+):
+    # Offset pages keep their total by default; cursor pages only count when asked to
+    if include_total is None:
+        include_total = cursor is None
+    
+    ttl = settings.FEED_CACHE_TTL_SECONDS
+    cached = None
+    if ttl > 0:
+        version = await cache.get_counter(FEED_VERSION_KEY)
+        cache_key = "feed:v{}:{}:{}:{}:{}:{}".format(
+            version,
+            "" if cursor else page,
+            limit,
+            encode_cursor(*cursor) if cursor else "",
+            pseudonym or "",
+            int(include_total)
+        )
+        cached = await cache.get(cache_key)
+    if cached is None:
+        cached = await _build_feed_page(db, page, limit, pseudonym, cursor, include_total)
+        if ttl > 0:
+            await cache.set(cache_key, cached, ttl)
+    
+    # Batch fetch votes if user is logged in
+    user_votes_map = {}
+    if user and cached["post_ids"]:
+        from src.post_actions.models import Vote
+        votes = (await db.scalars(select(Vote).where(
+            Vote.post_id.in_(cached["post_ids"]),
+            Vote.user_id == user.id
+        ))).all()
+        user_votes_map = {v.post_id: v.vote_type.value for v in votes}
+    
+    # Overlay the viewer's votes on copies so the cached entry stays untouched
+    data = dict(cached["data"])
+    data["posts"] = [
+        {**post, "user_vote_status": user_votes_map.get(post_id, "none")}
+        for post_id, post in zip(cached["post_ids"], cached["data"]["posts"])
+    ]
     return SuccessResponse(
         message="Posts fetched successfully", 
         code=status.HTTP_200_OK, 
@@ -140,20 +202,25 @@ def get_feed(db: Session, page: int = 1, limit: int = 10, user: User_Account = N
     )
         
 
-def get_post(db: Session, post_id: int) -> Post:
-    return db.query(Post).filter(Post.id == post_id).first()
+async def get_post(db: AsyncSession, post_id: int) -> Post:
+    return await db.scalar(select(Post).options(joinedload(Post.author)).where(Post.id == post_id))
 
-async def update_post(db: Session, post_id: int, data: PostUpdate) -> Post:
-    post = get_post(db, post_id)
+async def update_post(db: AsyncSession, post_id: int, data: PostUpdate) -> Post:
+    post = await get_post(db, post_id)
     if not post:
         return None
 
     update_data = data.dict(exclude_unset=True)
+    indexed_text = (post.title, post.description)
     for key, value in update_data.items():
         setattr(post, key, value)
 
-    db.commit()
-    db.refresh(post)
+    await db.commit()
+    await db.refresh(post, ["updated_at", "author"])
+    await invalidate_feed_cache()
+    if post_index and indexed_text != (post.title, post.description):
+        post_index.remove(post.id, *indexed_text)
+        post_index.add(post.id, post.title, post.description)
     
     # Broadcast update
     await manager.broadcast({
@@ -166,13 +233,18 @@ async def update_post(db: Session, post_id: int, data: PostUpdate) -> Post:
     
     return post
 
-async def delete_post(db: Session, post_id: int) -> bool:
-    post = get_post(db, post_id)
+async def delete_post(db: AsyncSession, post_id: int) -> bool:
+    post = await get_post(db, post_id)
     if not post:
         return False
 
-    db.delete(post)
-    db.commit()
+    await db.delete(post)
+    if post.user_id:
+        await db.execute(update(User_Account).where(User_Account.id == post.user_id).values(posts_count=User_Account.posts_count - 1))
+    await db.commit()
+    await invalidate_feed_cache()
+    if post_index:
+        post_index.remove(post.id, post.title, post.description)
     
     # Broadcast deletion
     await manager.broadcast({
@@ -0,0 +1,76 @@
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update, select, case, func, bindparam
+from sqlalchemy.orm import Session
+from src.config import settings
+from src.post.models import Post
+from src.post_actions.models import Comment, Vote, VoteType
+
+# Scores live on a log scale anchored at the unix epoch: trending_score is
+# ln(sum of weight * e^(t / TIME_SCALE)) over a post's upvotes and comments, t being the
+# event time in seconds. Decay multiplies every post by the same factor, which never changes
+# their order, so nothing is rewritten as time passes: newer events just weigh more.
+# 0 means no activity and ranks below any event since 1970.
+# Every UPDATE here sets updated_at to itself: these are not edits, and without it the
+# column's onupdate would fire on each one.
+HALF_LIFE_SECONDS = settings.TRENDING_HALF_LIFE_HOURS * 3600
+TIME_SCALE = HALF_LIFE_SECONDS / math.log(2)
+UPVOTE_WEIGHT = 1.0
+COMMENT_WEIGHT = 1.0
+# Only activity this recent is replayed by rebuild_trending_scores
+REBUILD_WINDOW = timedelta(days=7)
+# e^-60 vanishes next to 1 in a float; PostgreSQL also raises on exp() underflow
+MAX_EXPONENT_GAP = 60
+
+def current_score(trending_score: float, now: float) -> float:
+    """The decayed activity a stored score stands for at now."""
+    return math.exp(trending_score - now / TIME_SCALE) if trending_score else 0.0
+
+def bump_trending(weight) -> dict:
+    """values() for an UPDATE on posts that adds weight to the trending score."""
+    now = time.time() / TIME_SCALE
+    gap = Post.trending_score - now
+    # ln(e^score + weight * e^now), factored around whichever exponent is larger
+    total = case(
+        (gap > MAX_EXPONENT_GAP, 1.0),
+        (gap >= 0, 1 + weight * func.exp(-gap)),
+        (gap < -MAX_EXPONENT_GAP, weight),
+        else_=func.exp(gap) + weight
+    )
+    larger = case((gap >= 0, Post.trending_score), else_=now)
+    # A withdrawn upvote takes back its full weight at today's scale, which is more than it added
+    return {"trending_score": case((total > 0, larger + func.ln(total)), else_=0.0)}
+
+def rebuild_trending_scores(db: Session) -> int:
+    """Recompute every score from recent upvotes and comments. Returns the number of posts scored."""
+    since = datetime.utcnow() - REBUILD_WINDOW
+    events = [
+        (UPVOTE_WEIGHT, select(Vote.post_id, Vote.created_at).where(Vote.vote_type == VoteType.UPVOTE, Vote.created_at >= since)),
+        (COMMENT_WEIGHT, select(Comment.post_id, Comment.created_at).where(Comment.created_at >= since)),
+    ]
+    exponents = defaultdict(list)
+    for weight, query in events:
+        for post_id, created_at in db.execute(query):
+            exponents[post_id].append(
+                (created_at.replace(tzinfo=timezone.utc).timestamp() / TIME_SCALE, weight)
+            )
+    scores = {}
+    for post_id, terms in exponents.items():
+        largest = max(exponent for exponent, _ in terms)
+        scores[post_id] = largest + math.log(sum(weight * math.exp(exponent - largest) for exponent, weight in terms))
+
+    posts = Post.__table__
+    db.execute(update(posts).where(posts.c.trending_score != 0).values(
+        trending_score=0, updated_at=posts.c.updated_at
+    ))
+    if scores:
+        db.execute(
+            update(posts).where(posts.c.id == bindparam("b_id")).values(
+                trending_score=bindparam("b_score"), updated_at=posts.c.updated_at
+            ),
+            [{"b_id": post_id, "b_score": score} for post_id, score in scores.items()]
+        )
+    db.commit()
+    return len(scores)
@@ -1,9 +1,16 @@
-from sqlalchemy import Column, BigInteger, ForeignKey, Enum, DateTime, Text, UniqueConstraint
+from sqlalchemy import Column, BigInteger, ForeignKey, Enum, DateTime, Text, UniqueConstraint, Index, String, Integer
 from sqlalchemy.orm import relationship
-from src.database import Base
+from src.database import Base, BigIntegerPK
 from datetime import datetime
 import enum
 
+# Roots sit at depth 0, so this allows two layers of nesting
+MAX_COMMENT_DEPTH = 2
+
+def comment_path_segment(comment_id: int) -> str:
+    # Fixed width keeps lexical order equal to id order within a path
+    return f"{comment_id:016x}/"
+
 class VoteType(str, enum.Enum):
     UPVOTE = "upvote"
     DOWNVOTE = "downvote"
@@ -11,22 +18,36 @@ class VoteType(str, enum.Enum):
 class Comment(Base):
     __tablename__ = "post_comments"
     
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerPK, primary_key=True, index=True)
     post_id = Column(BigInteger, ForeignKey("posts.id"), nullable=False)
     user_id = Column(BigInteger, ForeignKey("user_account.id"), nullable=False)
     parent_id = Column(BigInteger, ForeignKey("post_comments.id"), nullable=True)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Materialized path of ancestor ids ("" for roots). Descendants of a comment
+    # are exactly the rows whose path starts with comment.path + its own segment.
+    path = Column(String, default="", server_default="", nullable=False)
+    depth = Column(Integer, default=0, server_default="0", nullable=False)
     
     # Relationships
     post = relationship("Post", back_populates="comments")
     author = relationship("User_Account", backref="post_comments")
     parent = relationship("Comment", remote_side=[id], backref="replies")
 
+    __table_args__ = (
+        Index("ix_post_comments_post_id_created_at", "post_id", "created_at"),
+        Index("ix_post_comments_parent_id_created_at", "parent_id", "created_at"),
+        Index("ix_post_comments_path", "path", postgresql_ops={"path": "text_pattern_ops"}),
+    )
+
+    @property
+    def subtree_prefix(self) -> str:
+        return self.path + comment_path_segment(self.id)
+
 class Vote(Base):
     __tablename__ = "post_votes"
     
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerPK, primary_key=True, index=True)
     post_id = Column(BigInteger, ForeignKey("posts.id"), nullable=False)
     user_id = Column(BigInteger, ForeignKey("user_account.id"), nullable=False)
     vote_type = Column(Enum(VoteType), nullable=False)
@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends, status, HTTPException
-from sqlalchemy.orm import Session
-from typing import Any
+from fastapi import APIRouter, Depends, Query, status, HTTPException
+from typing import Any, Optional
 from . import service, schemas
-from src.post.router import get_valid_post_id
+from src.post.router import get_valid_post_id, get_valid_cursor
 from src.auth.auth_dependencies import DB_SESSION, get_current_user, CURRENT_USER
 from src.core.schemas import APIResponse
 from src.core.utils.response import SuccessResponse
+from src.utils.encoding import decode_ids
 
 router = APIRouter()
 
@@ -26,19 +26,73 @@ async def add_comment(
         data=resp
     )
 
-@router.get("/{id}/comments", response_model=APIResponse[list[schemas.CommentResponse]])
+@router.get("/{id}/comments", response_model=APIResponse[schemas.CommentPage])
 async def get_comments(
     id: str,
-    db: DB_SESSION
+    db: DB_SESSION,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None)
 ):
     post_id = get_valid_post_id(id)
-    comments = service.get_comments(db, post_id)
+    comments = await service.get_comments(db, post_id, limit, get_valid_cursor(cursor))
     return SuccessResponse(
         message="Comments fetched successfully", 
         code=status.HTTP_200_OK, 
         data=comments
     )
 
+@router.get("/{id}/comments/{comment_id}/replies", response_model=APIResponse[schemas.CommentPage])
+async def get_replies(
+    id: str,
+    comment_id: str,
+    db: DB_SESSION,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None)
+):
+    post_id = get_valid_post_id(id)
+    try:
+        parent_id = decode_ids(comment_id)
+    except (ValueError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid comment ID format")
+    replies = await service.get_replies(db, post_id, parent_id, limit, get_valid_cursor(cursor))
+    return SuccessResponse(
+        message="Replies fetched successfully", 
+        code=status.HTTP_200_OK, 
+        data=replies
+    )
+
+@router.get("/{id}/comments/{comment_id}/thread", response_model=APIResponse[schemas.CommentResponse])
+async def get_thread(
+    id: str,
+    comment_id: str,
+    db: DB_SESSION
+):
+    post_id = get_valid_post_id(id)
+    try:
+        root_id = decode_ids(comment_id)
+    except (ValueError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid comment ID format")
+    thread = await service.get_thread(db, post_id, root_id)
+    return SuccessResponse(
+        message="Thread fetched successfully", 
+        code=status.HTTP_200_OK, 
+        data=thread
+    )
+
+@router.post("/vote-status", response_model=APIResponse[list[schemas.VoteStatusResponse]])
+async def get_vote_statuses(
+    data: schemas.VoteStatusRequest,
+    db: DB_SESSION,
+    user: CURRENT_USER
+):
+    post_ids = [get_valid_post_id(post_id) for post_id in data.post_ids]
+    statuses = await service.get_vote_statuses(db, user, post_ids)
+    return SuccessResponse(
+        message="Vote statuses fetched", 
+        code=status.HTTP_200_OK, 
+        data=statuses
+    )
+
 @router.post("/{id}/vote", response_model=APIResponse[Any]) # Use Any or refine schema if needed
 async def cast_vote(
     id: str,
@@ -18,7 +18,9 @@ class CommentResponse(CommentBase):
     parent_id: Optional[int] = None
     pseudonym: Optional[str] = None
     created_at: datetime
-    replies: List["CommentResponse"] = []
+    replies_count: int = 0
+    # Replies are paged in separately; the alias stops model_validate walking Comment.replies
+    replies: List["CommentResponse"] = Field(default=[], validation_alias="reply_tree")
 
     class Config:
         from_attributes = True
@@ -29,8 +31,25 @@ class CommentResponse(CommentBase):
             return ""
         return encode_ids(v)
 
+class CommentPage(BaseModel):
+    comments: List[CommentResponse]
+    next_cursor: Optional[str] = None
+
 class VoteRequest(BaseModel):
     vote_type: VoteType
 
+class VoteStatusRequest(BaseModel):
+    post_ids: List[str] = Field(..., min_length=1, max_length=100) # Base62 strings
+
+class VoteStatusResponse(BaseModel):
+    post_id: int
+    user_vote_status: str = "none"
+    upvotes: int
+    downvotes: int
+
+    @field_serializer("post_id")
+    def serialize_post_id(self, v: int) -> str:
+        return encode_ids(v)
+
 class StatusUpdate(BaseModel):
     status: PostStatus
@@ -1,48 +1,76 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, func, tuple_, or_
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 from src.post.models import Post, PostStatus
-from .models import Comment, Vote, VoteType
-from .schemas import CommentCreate, VoteRequest
+from src.post.service import invalidate_feed_cache
+from src.post.trending import bump_trending, COMMENT_WEIGHT, UPVOTE_WEIGHT
+from .vote_buffer import vote_buffer
+from .models import Comment, Vote, VoteType, MAX_COMMENT_DEPTH, comment_path_segment
+from .schemas import CommentCreate, CommentResponse, CommentPage, VoteRequest, VoteStatusResponse
 from src.auth.models.user_account import User_Account
+from src.auth.auth_dependencies import UserPrincipal
 from src.core.utils.response import SuccessResponse
-from src.notifications.service import create_notification
-from src.utils.encoding import decode_ids, encode_ids
-import asyncio
+from src.core.websocket_manager import manager
+from src.tasks.queue import task_queue
+from src.utils.encoding import decode_ids, encode_ids, encode_cursor
+from src.database import dialect_insert
+from datetime import datetime
 
-async def add_comment(db: Session, user: User_Account, post_id: int, data: CommentCreate):
-    post = db.query(Post).filter(Post.id == post_id).first()
+async def add_comment(db: AsyncSession, user: UserPrincipal, post_id: int, data: CommentCreate):
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
     parent_id = None
+    path, depth = "", 0
     if data.parent_id:
         try:
             parent_id = decode_ids(data.parent_id)
         except (ValueError, KeyError):
             raise HTTPException(status_code=400, detail="Invalid parent_id format")
             
-        parent = db.query(Comment).filter(Comment.id == parent_id, Comment.post_id == post_id).first()
+        parent = await db.scalar(select(Comment).where(Comment.id == parent_id, Comment.post_id == post_id))
         if not parent:
             raise HTTPException(status_code=404, detail="Parent comment not found")
         
         # Enforce 2-layer depth limit
-        if parent.parent_id is not None:
-            grandfather = db.query(Comment).filter(Comment.id == parent.parent_id).first()
-            if grandfather and grandfather.parent_id is not None:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST, 
-                    detail="Maximum comment depth reached (only 2 layers of nesting allowed)"
-                )
+        if parent.depth >= MAX_COMMENT_DEPTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, 
+                detail="Maximum comment depth reached (only 2 layers of nesting allowed)"
+            )
+        path, depth = parent.subtree_prefix, parent.depth + 1
 
     new_comment = Comment(
         post_id=post_id,
         user_id=user.id,
         content=data.content,
-        parent_id=parent_id
+        parent_id=parent_id,
+        path=path,
+        depth=depth
     )
     db.add(new_comment)
-    db.commit()
-    db.refresh(new_comment)
+    # Evaluated in SQL so concurrent comments don't overwrite each other. Passing updated_at
+    # through keeps its onupdate from marking the post as edited.
+    await db.execute(update(Post).where(Post.id == post_id).values(
+        comments_count=Post.comments_count + 1,
+        updated_at=Post.updated_at,
+        **bump_trending(COMMENT_WEIGHT)
+    ))
+    # Notify post author
+    if post.user_id and post.user_id != user.id:
+        await task_queue.enqueue(
+            db, "notification",
+            recipient_id=post.user_id,
+            type="comment",
+            message=f"{user.pseudonym} commented on your post: {post.title[:30]}...",
+            sender_id=user.id,
+            post_id=encode_ids(post_id)
+        )
+    await db.commit()
+    await db.refresh(new_comment)
     
     # Broadcast new comment
     await manager.broadcast({
@@ -57,82 +85,95 @@ async def add_comment(db: Session, user: User_Account, post_id: int, data: Comme
         }
     })
     
-    # Notify post author
-    if post.user_id and post.user_id != user.id:
-        asyncio.create_task(create_notification(
-            db,
-            recipient_id=post.user_id,
-            type="comment",
-            message=f"{user.pseudonym} commented on your post: {post.title[:30]}...",
-            sender_id=user.id,
-            post_id=encode_ids(post_id)
-        ))
-    
     return new_comment
 
-async def cast_vote(db: Session, user: User_Account, post_id: int, vote_type: VoteType):
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
+async def _apply_vote(db: AsyncSession, user_id: int, post_id: int, vote_type: VoteType) -> tuple[str, int, int, bool]:
+    """Toggle the user's vote row with conditional statements, so the counter deltas we return
+    always match the row change that actually happened. Returns (new status, upvote delta, downvote delta, inserted)."""
+    sign = {VoteType.UPVOTE: (1, 0), VoteType.DOWNVOTE: (0, 1)}
+    up, down = sign[vote_type]
+    voter = (Vote.post_id == post_id, Vote.user_id == user_id)
+    
+    # Each attempt either changes exactly one row or tells us another request got there first
+    for _ in range(3):
+        # New vote: the common case and the only statement needed
+        inserted = await db.scalar(
+            dialect_insert(db)(Vote)
+            .values(post_id=post_id, user_id=user_id, vote_type=vote_type, created_at=datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=["post_id", "user_id"])
+            .returning(Vote.id)
+        )
+        if inserted is not None:
+            return vote_type.value, up, down, True
+        
+        # Same type again: toggle off
+        removed = await db.scalar(delete(Vote).where(*voter, Vote.vote_type == vote_type).returning(Vote.id))
+        if removed is not None:
+            return "none", -up, -down, False
+        
+        # Opposite type: switch
+        switched = await db.scalar(
+            update(Vote).where(*voter, Vote.vote_type != vote_type).values(vote_type=vote_type).returning(Vote.id)
+        )
+        if switched is not None:
+            return vote_type.value, up - down, down - up, False
+    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Vote changed concurrently, please retry")
+
+async def cast_vote(db: AsyncSession, user: UserPrincipal, post_id: int, vote_type: VoteType):
+    try:
+        new_vote_status, up_delta, down_delta, inserted = await _apply_vote(db, user.id, post_id, vote_type)
+    except IntegrityError:
+        # Foreign key violation: the post does not exist
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Post not found")
     
-    existing_vote = db.query(Vote).filter(
-        Vote.post_id == post_id,
-        Vote.user_id == user.id
-    ).first()
-    
-    new_vote_status = "none"
-    if existing_vote:
-        if existing_vote.vote_type == vote_type:
-            # Toggle off
-            db.delete(existing_vote)
-            if vote_type == VoteType.UPVOTE:
-                post.upvotes_count -= 1
-            else:
-                post.downvotes_count -= 1
-        else:
-            # Change vote type
-            existing_vote.vote_type = vote_type
-            new_vote_status = vote_type.value
-            if vote_type == VoteType.UPVOTE:
-                post.upvotes_count += 1
-                post.downvotes_count -= 1
-            else:
-                post.downvotes_count += 1
-                post.upvotes_count -= 1
+    if vote_buffer:
+        # Write-behind: leave the hot posts row unlocked; the delta is buffered once the vote commits
+        counts = (await db.execute(
+            select(Post.upvotes_count, Post.downvotes_count, Post.user_id, Post.title).where(Post.id == post_id)
+        )).first()
     else:
-        # New vote
-        new_vote = Vote(
-            post_id=post_id,
-            user_id=user.id,
-            vote_type=vote_type
+        # Relative update so concurrent voters never overwrite each other's counts
+        trending = bump_trending(up_delta * UPVOTE_WEIGHT) if up_delta else {}
+        counts = (await db.execute(
+            update(Post)
+            .where(Post.id == post_id)
+            .values(
+                upvotes_count=Post.upvotes_count + up_delta,
+                downvotes_count=Post.downvotes_count + down_delta,
+                updated_at=Post.updated_at,
+                **trending
+            )
+            .returning(Post.upvotes_count, Post.downvotes_count, Post.user_id, Post.title)
+            .execution_options(synchronize_session=False)
+        )).first()
+    if counts is None:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Post not found")
+    upvotes, downvotes, author_id, title = counts
+    # Notify post author on upvote
+    if inserted and vote_type == VoteType.UPVOTE and author_id and author_id != user.id:
+        await task_queue.enqueue(
+            db, "notification",
+            recipient_id=author_id,
+            type="like",
+            message=f"{user.pseudonym} upvoted your post: {title[:30]}...",
+            sender_id=user.id,
+            post_id=encode_ids(post_id)
         )
-        db.add(new_vote)
-        new_vote_status = vote_type.value
-        if vote_type == VoteType.UPVOTE:
-            post.upvotes_count += 1
-            # Notify post author on upvote
-            if post.user_id and post.user_id != user.id:
-                asyncio.create_task(create_notification(
-                    db,
-                    recipient_id=post.user_id,
-                    type="like",
-                    message=f"{user.pseudonym} upvoted your post: {post.title[:30]}...",
-                    sender_id=user.id,
-                    post_id=encode_ids(post_id)
-                ))
-        else:
-            post.downvotes_count += 1
-            
-    db.commit()
-    db.refresh(post)
+    await db.commit()
+    if vote_buffer:
+        vote_buffer.add(post_id, up_delta, down_delta)
+        pending_up, pending_down = vote_buffer.pending_for(post_id)
+        upvotes, downvotes = upvotes + pending_up, downvotes + pending_down
     
     # Broadcast vote update
     await manager.broadcast({
         "event": "vote_update",
         "data": {
             "post_id": post_id,
-            "upvotes": post.upvotes_count,
-            "downvotes": post.downvotes_count
+            "upvotes": upvotes,
+            "downvotes": downvotes
         }
     })
     
@@ -141,19 +182,40 @@ async def cast_vote(db: Session, user: User_Account, post_id: int, vote_type: Vo
         code=status.HTTP_200_OK, 
         data={
             "user_vote_status": new_vote_status,
-            "upvotes": post.upvotes_count,
-            "downvotes": post.downvotes_count
+            "upvotes": upvotes,
+            "downvotes": downvotes
         }
     )
 
-async def update_post_status(db: Session, post_id: int, new_status: PostStatus):
-    post = db.query(Post).filter(Post.id == post_id).first()
+async def get_vote_statuses(db: AsyncSession, user: UserPrincipal, post_ids: list[int]) -> list[VoteStatusResponse]:
+    """The caller's vote and the current counters for many posts, in one query on the (post_id, user_id) index."""
+    rows = (await db.execute(
+        select(Post.id, Post.upvotes_count, Post.downvotes_count, Vote.vote_type)
+        .outerjoin(Vote, (Vote.post_id == Post.id) & (Vote.user_id == user.id))
+        .where(Post.id.in_(post_ids))
+    )).all()
+    
+    statuses = []
+    for post_id, upvotes, downvotes, vote_type in rows:
+        if vote_buffer:
+            pending_up, pending_down = vote_buffer.pending_for(post_id)
+            upvotes, downvotes = upvotes + pending_up, downvotes + pending_down
+        statuses.append(VoteStatusResponse(
+            post_id=post_id,
+            user_vote_status=vote_type.value if vote_type else "none",
+            upvotes=upvotes,
+            downvotes=downvotes
+        ))
+    return statuses
+
+async def update_post_status(db: AsyncSession, post_id: int, new_status: PostStatus):
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
     post.status = new_status
-    db.commit()
-    db.refresh(post)
+    await db.commit()
+    await invalidate_feed_cache()
     
     # Broadcast status update
     await manager.broadcast({
@@ -166,25 +228,138 @@ async def update_post_status(db: Session, post_id: int, new_status: PostStatus):
     
     return post
 
-def enrich_comment(comment_obj, comment_schema):
-    if comment_obj.author:
-        comment_schema.pseudonym = comment_obj.author.pseudonym
-    for sub_obj, sub_schema in zip(comment_obj.replies, comment_schema.replies):
-        enrich_comment(sub_obj, sub_schema)
+async def _comment_page(db: AsyncSession, filters: list, limit: int, cursor=None, newest_first: bool = False) -> CommentPage:
+    # One query: the comments, their authors' pseudonyms and each one's direct reply count
+    Reply = aliased(Comment)
+    replies_count = select(func.count(Reply.id)).where(Reply.parent_id == Comment.id).scalar_subquery()
+    query = select(Comment, User_Account.pseudonym, replies_count).outerjoin(
+        User_Account, Comment.user_id == User_Account.id
+    ).where(*filters)
+    
+    position = tuple_(Comment.created_at, Comment.id)
+    if newest_first:
+        query = query.order_by(Comment.created_at.desc(), Comment.id.desc())
+        if cursor:
+            query = query.where(position < tuple_(*cursor))
+    else:
+        query = query.order_by(Comment.created_at, Comment.id)
+        if cursor:
+            query = query.where(position > tuple_(*cursor))
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    comments = []
+    for comment, pseudonym, count in rows:
+        node = CommentResponse.model_validate(comment)
+        node.pseudonym = pseudonym
+        node.replies_count = count
+        comments.append(node)
+    
+    next_cursor = None
+    if has_more:
+        last = rows[-1][0]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return CommentPage(comments=comments, next_cursor=next_cursor)
+
+async def get_comments(db: AsyncSession, post_id: int, limit: int = 20, cursor=None) -> CommentPage:
+    """Root comments of a post, newest first."""
+    return await _comment_page(
+        db,
+        [Comment.post_id == post_id, Comment.parent_id == None],
+        limit,
+        cursor,
+        newest_first=True
+    )
 
-def get_comments(db: Session, post_id: int):
-    # Fetch all top-level comments for the post
-    # Eager loading replies would be good but standard lazy loading might suffice for now
-    # We filter by parent_id IS NULL to get roots
-    root_comments = db.query(Comment).filter(
-        Comment.post_id == post_id,
-        Comment.parent_id == None
-    ).order_by(Comment.created_at.desc()).all()
-    
-    from .schemas import CommentResponse
-    comment_responses = [CommentResponse.model_validate(c) for c in root_comments]
-    
-    for c_obj, c_schema in zip(root_comments, comment_responses):
-        enrich_comment(c_obj, c_schema)
-        
-    return comment_responses
+async def get_replies(db: AsyncSession, post_id: int, parent_id: int, limit: int = 20, cursor=None) -> CommentPage:
+    """Direct replies to a comment, oldest first."""
+    return await _comment_page(
+        db,
+        [Comment.post_id == post_id, Comment.parent_id == parent_id],
+        limit,
+        cursor
+    )
+
+async def get_thread(db: AsyncSession, post_id: int, comment_id: int) -> CommentResponse:
+    """A comment with all of its descendants nested under it, read as one range scan on Comment.path."""
+    root = await db.scalar(select(Comment).where(Comment.id == comment_id, Comment.post_id == post_id))
+    if not root:
+        raise HTTPException(status_code=404, detail="Comment not found")
+    
+    rows = (await db.execute(
+        select(Comment, User_Account.pseudonym).outerjoin(
+            User_Account, Comment.user_id == User_Account.id
+        ).where(
+            or_(Comment.id == root.id, Comment.path.startswith(root.subtree_prefix, autoescape=True))
+        ).order_by(Comment.depth, Comment.created_at, Comment.id)
+    )).all()
+    
+    # Ordering by depth guarantees every parent is built before its replies
+    nodes = {}
+    for comment, pseudonym in rows:
+        node = CommentResponse.model_validate(comment)
+        node.pseudonym = pseudonym
+        nodes[comment.id] = node
+        parent = nodes.get(comment.parent_id) if comment.id != root.id else None
+        if parent:
+            parent.replies.append(node)
+            parent.replies_count += 1
+    return nodes[root.id]
+
+# Maintenance helpers below run on the synchronous engine (src/manage.py and startup migrations)
+
+def reconcile_comment_counts(db: Session) -> int:
+    """Recompute Post.comments_count from post_comments. Returns the number of posts corrected."""
+    actual = select(func.count(Comment.id)).where(Comment.post_id == Post.id).scalar_subquery()
+    result = db.execute(
+        update(Post)
+        .where(Post.comments_count != actual)
+        .values(comments_count=actual, updated_at=Post.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+def backfill_comment_paths(db: Session) -> int:
+    """Recompute Comment.path and Comment.depth from parent_id. Returns the number of comments corrected."""
+    rows = db.query(Comment.id, Comment.parent_id, Comment.path, Comment.depth).all()
+    parents = {row.id: row.parent_id for row in rows}
+    computed = {}
+    
+    def locate(comment_id):
+        if comment_id not in computed:
+            parent_id = parents.get(comment_id)
+            if parent_id is None:
+                computed[comment_id] = ("", 0)
+            else:
+                parent_path, parent_depth = locate(parent_id)
+                computed[comment_id] = (parent_path + comment_path_segment(parent_id), parent_depth + 1)
+        return computed[comment_id]
+    
+    changes = []
+    for row in rows:
+        path, depth = locate(row.id)
+        if (row.path, row.depth) != (path, depth):
+            changes.append({"id": row.id, "path": path, "depth": depth})
+    
+    for start in range(0, len(changes), 1000):
+        db.execute(update(Comment), changes[start:start + 1000])
+    db.commit()
+    return len(changes)
+
+def reconcile_vote_counts(db: Session) -> int:
+    """Recompute Post.upvotes_count/downvotes_count from post_votes. Returns the number of posts corrected."""
+    def tally(vote_type: VoteType):
+        return select(func.count(Vote.id)).where(
+            Vote.post_id == Post.id, Vote.vote_type == vote_type
+        ).scalar_subquery()
+    upvotes, downvotes = tally(VoteType.UPVOTE), tally(VoteType.DOWNVOTE)
+    result = db.execute(
+        update(Post)
+        .where(or_(Post.upvotes_count != upvotes, Post.downvotes_count != downvotes))
+        .values(upvotes_count=upvotes, downvotes_count=downvotes, updated_at=Post.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
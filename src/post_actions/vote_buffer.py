@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from collections import defaultdict
+from sqlalchemy import update, bindparam, Float
+from src.config import settings
+from src.database import async_engine
+from src.post.models import Post
+from src.post.trending import bump_trending, UPVOTE_WEIGHT
+
+logger = logging.getLogger(__name__)
+
+class VoteCounterBuffer:
+    """Accumulates per-post vote deltas in memory and applies them in batches.
+
+    post_votes stays the source of truth; only the denormalized counters on posts
+    lag behind, by at most one flush interval. Deltas are relative, so every
+    worker can run its own buffer against the same rows."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.pending: dict[int, list[int]] = defaultdict(lambda: [0, 0])
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+
+    def add(self, post_id: int, up_delta: int, down_delta: int):
+        counts = self.pending[post_id]
+        counts[0] += up_delta
+        counts[1] += down_delta
+
+    def pending_for(self, post_id: int) -> tuple[int, int]:
+        counts = self.pending.get(post_id)
+        return (counts[0], counts[1]) if counts else (0, 0)
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, defaultdict(lambda: [0, 0])
+        params = [
+            {"b_id": post_id, "b_up": up, "b_down": down, "b_trending": up * UPVOTE_WEIGHT}
+            for post_id, (up, down) in batch.items()
+            if up or down
+        ]
+        if not params:
+            return
+        committed = False
+        try:
+            # Plain Core executemany: one round-trip for the whole batch
+            posts = Post.__table__
+            async with async_engine.begin() as conn:
+                await conn.execute(
+                    update(posts)
+                    .where(posts.c.id == bindparam("b_id"))
+                    .values(
+                        upvotes_count=posts.c.upvotes_count + bindparam("b_up"),
+                        downvotes_count=posts.c.downvotes_count + bindparam("b_down"),
+                        updated_at=posts.c.updated_at,
+                        **bump_trending(bindparam("b_trending", type_=Float))
+                    ),
+                    params
+                )
+            committed = True
+        except Exception:
+            logger.exception("Vote counter flush failed; keeping %d post deltas for the next run", len(params))
+        finally:
+            # Also reached on cancellation, which `except Exception` does not see
+            if not committed:
+                for post_id, (up, down) in batch.items():
+                    self.add(post_id, up, down)
+
+    async def _run(self):
+        # Ends through stop() rather than cancellation, so a flush is never cut off halfway
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+            except asyncio.TimeoutError:
+                await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+vote_buffer = VoteCounterBuffer(settings.VOTE_FLUSH_INTERVAL_SECONDS) if settings.VOTE_WRITE_BEHIND else None
@@ -0,0 +1,79 @@
+import re
+from sqlalchemy import select, func, literal_column, tuple_, text, table, column
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.post.models import Post
+
+# PostgreSQL keeps a generated tsvector on posts behind a GIN index; SQLite mirrors
+# the same columns into an FTS5 table kept in sync by triggers. Neither lives on the
+# Post model, so create_all and the ORM never see them.
+TS_CONFIG = "english"
+
+POSTGRES_DDL = [
+    f"""ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{TS_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{TS_CONFIG}', coalesce(description, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING GIN (search_vector)",
+]
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(title, description, content='posts', content_rowid='id')",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF title, description ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO posts_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+def ensure_post_search_index(conn: Connection):
+    """Idempotent; run from the startup migrations."""
+    if conn.dialect.name == "postgresql":
+        for statement in POSTGRES_DDL:
+            conn.execute(text(statement))
+    elif conn.dialect.name == "sqlite":
+        existed = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'posts_fts'")).first()
+        for statement in SQLITE_DDL:
+            conn.execute(text(statement))
+        if not existed:
+            conn.execute(text("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')"))
+
+def search_terms(query_str: str) -> list[str]:
+    # Word characters only, which also keeps tsquery/FTS5 syntax out of user input
+    return re.findall(r"\w+", query_str.lower())
+
+async def search_post_ids(
+    db: AsyncSession,
+    query_str: str,
+    limit: int,
+    cursor: tuple[float, int] | None = None
+) -> list[tuple[int, float]]:
+    """Ids of matching posts with their relevance score, best first. Every term must match, the last one as a prefix."""
+    terms = search_terms(query_str)
+    if not terms:
+        return []
+    
+    if db.bind.dialect.name == "postgresql":
+        tsquery = func.to_tsquery(TS_CONFIG, " & ".join(terms) + ":*")
+        vector = literal_column("posts.search_vector")
+        score = func.ts_rank(vector, tsquery)
+        query = select(Post.id, score.label("score")).where(vector.op("@@")(tsquery))
+    else:
+        fts = table("posts_fts", column("rowid"))
+        fts_ref = literal_column("posts_fts")
+        match = " ".join(f'"{term}"' for term in terms) + "*"
+        # bm25 is lower-is-better; negate it so both engines rank descending
+        score = -func.bm25(fts_ref)
+        query = select(Post.id, score.label("score")).join(
+            fts, fts.c.rowid == Post.id
+        ).where(fts_ref.op("MATCH")(match))
+    
+    if cursor:
+        query = query.where(tuple_(score, Post.id) < tuple_(*cursor))
+    rows = await db.execute(query.order_by(score.desc(), Post.id.desc()).limit(limit))
+    return [(post_id, float(post_score)) for post_id, post_score in rows.all()]
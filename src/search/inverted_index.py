@@ -0,0 +1,290 @@
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import groupby
+from sqlalchemy import select, func
+from sqlalchemy.engine import Connection
+from src.config import settings
+from src.post.models import Post
+from src.search.fulltext import search_terms
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"ICHIDX1\n"
+# Title matches count double, loosely mirroring the A/B weights of the tsvector
+TITLE_WEIGHT = 2
+BM25_K1 = 1.2
+BM25_B = 0.75
+# A short prefix would otherwise expand to, and score, most of the vocabulary
+MAX_PREFIX_TERMS = 50
+
+class InvertedIndex:
+    """Per-process inverted index over post titles and descriptions.
+
+    Each token maps to a sorted array of post ids with a parallel array of term
+    frequencies. After a snapshot load these are read-only views over the mapped
+    file, copied into arrays the first time a write touches them. The index is built at startup and kept current by the post
+    service, so it only sees writes made by its own worker: use it for
+    single-process deployments, or where a restart-bounded lag is acceptable."""
+
+    def __init__(self, snapshot_path: str | None = None):
+        self.snapshot_path = snapshot_path
+        # Kept open while loaded posting lists still point into it
+        self.mapping: mmap.mmap | None = None
+        self.ids: dict[str, array | memoryview] = {}
+        self.freqs: dict[str, array | memoryview] = {}
+        # Sorted, for prefix expansion of the last query term
+        self.vocabulary: list[str] = []
+        self.doc_lengths: dict[int, int] = {}
+        self.total_length = 0
+
+    @staticmethod
+    def tokenize(title: str, description: str) -> Counter:
+        counts = Counter(search_terms(description or ""))
+        for term in search_terms(title or ""):
+            counts[term] += TITLE_WEIGHT
+        return counts
+
+    def add(self, post_id: int, title: str, description: str):
+        counts = self.tokenize(title, description)
+        for term, tf in counts.items():
+            ids = self.ids.get(term)
+            if ids is None:
+                self.ids[term], self.freqs[term] = array("q", [post_id]), array("I", [tf])
+                insort(self.vocabulary, term)
+                continue
+            ids, freqs = self._writable(term)
+            # New posts carry the highest id, so this is almost always an append
+            position = len(ids) if ids[-1] < post_id else bisect_left(ids, post_id)
+            if position < len(ids) and ids[position] == post_id:
+                freqs[position] = tf
+            else:
+                ids.insert(position, post_id)
+                freqs.insert(position, tf)
+        length = sum(counts.values())
+        self.total_length += length - self.doc_lengths.get(post_id, 0)
+        self.doc_lengths[post_id] = length
+
+    def _writable(self, term: str) -> tuple[array, array]:
+        ids, freqs = self.ids[term], self.freqs[term]
+        if isinstance(ids, memoryview):
+            ids, freqs = array("q", ids.tobytes()), array("I", freqs.tobytes())
+            self.ids[term], self.freqs[term] = ids, freqs
+        return ids, freqs
+
+    def remove(self, post_id: int, title: str, description: str):
+        """Takes the text the post was indexed with, so no per-document term list is kept."""
+        if post_id not in self.doc_lengths:
+            return
+        for term in self.tokenize(title, description):
+            if term not in self.ids:
+                continue
+            ids, freqs = self._writable(term)
+            position = bisect_left(ids, post_id)
+            if position < len(ids) and ids[position] == post_id:
+                del ids[position]
+                del freqs[position]
+            if not ids:
+                del self.ids[term], self.freqs[term]
+                del self.vocabulary[bisect_left(self.vocabulary, term)]
+        self.total_length -= self.doc_lengths.pop(post_id)
+
+    def _positions(self, term: str, candidates) -> list[int | None]:
+        """Position of each sorted candidate in the term's posting list, or None where it is absent.
+
+        Candidates are probed in order, so each search gallops forward from the previous hit
+        instead of bisecting the whole list again."""
+        ids = self.ids[term]
+        if candidates is ids:
+            return list(range(len(ids)))
+        positions, low, size = [], 0, len(ids)
+        for post_id in candidates:
+            step, high = 1, low
+            while high < size and ids[high] < post_id:
+                low, high, step = high + 1, high + step, step * 2
+            low = bisect_left(ids, post_id, low, min(high, size))
+            positions.append(low if low < size and ids[low] == post_id else None)
+        return positions
+
+    def _score(self, terms: list[str], candidates) -> dict[int, float]:
+        """BM25 over the surviving candidates only, with each term's idf computed once."""
+        total_docs = len(self.doc_lengths)
+        average_length = self.total_length / total_docs if total_docs else 1
+        base_norm, length_norm = BM25_K1 * (1 - BM25_B), BM25_K1 * BM25_B / average_length
+        lengths = self.doc_lengths
+        scores = dict.fromkeys(candidates, 0.0)
+        for term in terms:
+            ids, freqs = self.ids[term], self.freqs[term]
+            idf = math.log(1 + (total_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            if candidates is ids:
+                matches = zip(ids, freqs)
+            elif len(ids) <= len(scores):
+                # Walking a posting list no longer than the candidates beats probing it
+                matches = ((post_id, tf) for post_id, tf in zip(ids, freqs) if post_id in scores)
+            else:
+                positions = self._positions(term, candidates)
+                matches = ((post_id, freqs[p]) for post_id, p in zip(candidates, positions) if p is not None)
+            weight = idf * (BM25_K1 + 1)
+            for post_id, tf in matches:
+                scores[post_id] += weight * tf / (tf + base_norm + length_norm * lengths[post_id])
+        return scores
+
+    def search(
+        self,
+        query_str: str,
+        limit: int,
+        cursor: tuple[float, int] | None = None
+    ) -> list[tuple[int, float]]:
+        """Same contract as search_post_ids: every term must match, the last one as a prefix, best first.
+
+        The prefix expands to at most MAX_PREFIX_TERMS vocabulary terms, closest first."""
+        terms = search_terms(query_str)
+        if not terms:
+            return []
+        *exact_terms, prefix = terms
+        if any(term not in self.ids for term in exact_terms):
+            return []
+        start = bisect_left(self.vocabulary, prefix)
+        expansions = [
+            term for term in self.vocabulary[start:start + MAX_PREFIX_TERMS] if term.startswith(prefix)
+        ]
+        if not expansions:
+            return []
+
+        # Intersect before scoring, starting from the smaller of the rarest exact term and the prefix union
+        exact_terms = sorted(set(exact_terms), key=lambda term: len(self.ids[term]))
+        scored_terms = exact_terms + expansions
+        prefix_size = sum(len(self.ids[term]) for term in expansions)
+        if exact_terms and len(self.ids[exact_terms[0]]) < prefix_size:
+            candidates = self.ids[exact_terms[0]]
+            matched = [False] * len(candidates)
+            for term in expansions:
+                for i, position in enumerate(self._positions(term, candidates)):
+                    if position is not None:
+                        matched[i] = True
+            candidates = [post_id for post_id, hit in zip(candidates, matched) if hit]
+            exact_terms = exact_terms[1:]
+        elif len(expansions) == 1:
+            candidates = self.ids[expansions[0]]
+        else:
+            candidates = [post_id for post_id, _ in groupby(heapq.merge(*(self.ids[term] for term in expansions)))]
+        for term in exact_terms:
+            if not candidates:
+                return []
+            positions = self._positions(term, candidates)
+            candidates = [post_id for post_id, position in zip(candidates, positions) if position is not None]
+
+        ranked = ((score, post_id) for post_id, score in self._score(scored_terms, candidates).items())
+        if cursor:
+            ranked = (entry for entry in ranked if entry < cursor)
+        return [(post_id, score) for score, post_id in heapq.nlargest(limit, ranked)]
+
+    @staticmethod
+    def watermark(conn: Connection) -> list:
+        """Cheap fingerprint of the posts table; a snapshot is only reused while it still matches."""
+        count, max_id, last_update = conn.execute(
+            select(func.count(Post.id), func.max(Post.id), func.max(Post.updated_at))
+        ).one()
+        return [count, max_id, last_update.isoformat() if last_update else None]
+
+    def build(self, conn: Connection):
+        """Synchronous; run once at startup through AsyncConnection.run_sync."""
+        watermark = self.watermark(conn)
+        if self.snapshot_path and self.load_snapshot(watermark):
+            logger.info("Loaded search index snapshot with %d posts", len(self.doc_lengths))
+            return
+        rows = conn.execute(
+            select(Post.id, Post.title, Post.description).order_by(Post.id)
+        ).yield_per(1000)
+        for post_id, title, description in rows:
+            self.add(post_id, title, description)
+        logger.info("Built search index over %d posts", len(self.doc_lengths))
+        if self.snapshot_path:
+            self.save_snapshot(watermark)
+
+    def snapshot(self, conn: Connection):
+        """Synchronous; run at shutdown. Skipped when the table holds posts this worker never indexed."""
+        watermark = self.watermark(conn)
+        count, max_id, _ = watermark
+        if count != len(self.doc_lengths) or (max_id or 0) != max(self.doc_lengths, default=0):
+            logger.info("Search index diverged from the posts table; not snapshotting")
+            return
+        self.save_snapshot(watermark)
+
+    def save_snapshot(self, watermark: list):
+        """Header JSON (terms and offsets) followed by the raw arrays; written to a temp file then swapped in."""
+        doc_ids = array("q", sorted(self.doc_lengths))
+        doc_lengths = array("I", (self.doc_lengths[post_id] for post_id in doc_ids))
+        terms, blobs, offset = [], [], 0
+        for term in self.vocabulary:
+            ids, freqs = self.ids[term], self.freqs[term]
+            terms.append([term, offset, len(ids)])
+            blobs += [ids.tobytes(), freqs.tobytes()]
+            offset += len(ids) * (ids.itemsize + freqs.itemsize)
+        header = json.dumps({
+            "watermark": watermark,
+            "docs": [offset, len(doc_ids)],
+            "terms": terms,
+        }).encode()
+
+        temp_path = f"{self.snapshot_path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(SNAPSHOT_MAGIC + struct.pack("<Q", len(header)) + header)
+            for blob in blobs:
+                f.write(blob)
+            f.write(doc_ids.tobytes())
+            f.write(doc_lengths.tobytes())
+        os.replace(temp_path, self.snapshot_path)
+
+    def load_snapshot(self, watermark: list) -> bool:
+        """Maps the file and serves posting lists straight from it, so only the header and
+        the per-post lengths are parsed at startup; those lengths still become a dict."""
+        if not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            logger.warning("Could not read search index snapshot %s; rebuilding", self.snapshot_path)
+            return False
+        try:
+            if data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+                data.close()
+                return False
+            header_start = len(SNAPSHOT_MAGIC) + 8
+            (header_length,) = struct.unpack("<Q", data[len(SNAPSHOT_MAGIC):header_start])
+            header = json.loads(data[header_start:header_start + header_length])
+            if header["watermark"] != watermark:
+                logger.info("Search index snapshot is stale; rebuilding")
+                data.close()
+                return False
+
+            view = memoryview(data)[header_start + header_length:]
+            for term, offset, count in header["terms"]:
+                ids_end = offset + count * 8
+                self.ids[term] = view[offset:ids_end].cast("q")
+                self.freqs[term] = view[ids_end:ids_end + count * 4].cast("I")
+                if len(self.freqs[term]) != count:
+                    raise ValueError(f"Truncated posting list for {term!r}")
+            self.vocabulary = [term for term, _, _ in header["terms"]]
+
+            doc_offset, doc_count = header["docs"]
+            ids_end = doc_offset + doc_count * 8
+            doc_lengths = view[ids_end:ids_end + doc_count * 4].cast("I")
+            self.doc_lengths = dict(zip(view[doc_offset:ids_end].cast("q"), doc_lengths))
+            self.total_length = sum(doc_lengths)
+            self.mapping = data
+            return True
+        except (ValueError, KeyError, TypeError, struct.error):
+            logger.warning("Could not read search index snapshot %s; rebuilding", self.snapshot_path)
+            self.__init__(self.snapshot_path)
+            return False
+
+post_index = InvertedIndex(settings.SEARCH_INDEX_SNAPSHOT) if settings.SEARCH_BACKEND == "memory" else None
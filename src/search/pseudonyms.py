@@ -0,0 +1,82 @@
+import bisect
+import logging
+from sqlalchemy import select, func, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.auth.models import User_Account
+
+logger = logging.getLogger(__name__)
+
+class PrefixIndex:
+    """Sorted, case-folded pseudonyms; a prefix lookup is one bisect plus a short scan."""
+
+    def __init__(self, names: list[str] = ()):
+        self.keys = sorted((name.lower(), name) for name in names)
+
+    def add(self, name: str):
+        entry = (name.lower(), name)
+        position = bisect.bisect_left(self.keys, entry)
+        if position == len(self.keys) or self.keys[position] != entry:
+            self.keys.insert(position, entry)
+
+    def complete(self, prefix: str, limit: int, scan: int = 200) -> list[str]:
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self.keys, (prefix, ""))
+        matches = []
+        for key, name in self.keys[start:start + scan]:
+            if not key.startswith(prefix):
+                break
+            matches.append(name)
+        # Shorter names share more of themselves with the prefix, so rank them first
+        return sorted(matches, key=lambda name: (len(name), name.lower()))[:limit]
+
+class PseudonymSearch:
+    """Autocomplete over pseudonyms: pg_trgm when the database has it, an in-process prefix index otherwise."""
+
+    def __init__(self):
+        self.use_trigram = False
+        self.prefix_index: PrefixIndex | None = None
+
+    def setup(self, conn: Connection):
+        """Synchronous; run once at startup through AsyncConnection.run_sync."""
+        if conn.dialect.name == "postgresql":
+            try:
+                # CREATE EXTENSION needs privileges we may not have; don't poison the outer transaction
+                with conn.begin_nested():
+                    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                    conn.execute(text(
+                        "CREATE INDEX IF NOT EXISTS ix_user_account_pseudonym_trgm "
+                        "ON user_account USING GIN (pseudonym gin_trgm_ops)"
+                    ))
+                self.use_trigram = True
+            except DBAPIError:
+                logger.warning("pg_trgm unavailable; falling back to the in-process pseudonym index")
+        if not self.use_trigram:
+            self.prefix_index = PrefixIndex(conn.execute(select(User_Account.pseudonym)).scalars().all())
+
+    def add(self, pseudonym: str):
+        if self.prefix_index is not None:
+            self.prefix_index.add(pseudonym)
+
+    def order_by_similarity(self, query, query_str: str):
+        """Rank a pseudonym ILIKE query by trigram similarity when the index supports it."""
+        if self.use_trigram:
+            return query.order_by(func.similarity(User_Account.pseudonym, query_str).desc())
+        return query
+
+    async def autocomplete(self, db: AsyncSession, query_str: str, limit: int = 10) -> list[str]:
+        if self.prefix_index is not None:
+            return self.prefix_index.complete(query_str, limit)
+
+        similarity = func.similarity(User_Account.pseudonym, query_str)
+        prefix_match = User_Account.pseudonym.istartswith(query_str, autoescape=True)
+        result = await db.scalars(
+            select(User_Account.pseudonym)
+            .where(prefix_match | User_Account.pseudonym.op("%")(query_str))
+            .order_by(prefix_match.desc(), similarity.desc(), User_Account.pseudonym)
+            .limit(limit)
+        )
+        return result.all()
+
+pseudonym_search = PseudonymSearch()
@@ -1,27 +1,47 @@
-from fastapi import APIRouter
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Query
 from src.auth.auth_dependencies import DB_SESSION, CURRENT_USER
 from src.auth.models import User_Account
 from . import service, schemas
+from .pseudonyms import pseudonym_search
 from src.core.schemas import APIResponse
 from src.core.utils.response import SuccessResponse
 from src.post.schemas import PostResponse
-from typing import List
+from src.utils.encoding import decode_score_cursor
+from typing import List, Optional
 
 router = APIRouter()
 
+def get_valid_search_cursor(cursor: Optional[str]):
+    if not cursor:
+        return None
+    try:
+        return decode_score_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor format")
+
 @router.get("", response_model=APIResponse[schemas.SearchResults])
 async def search(
     q: str,
     db: DB_SESSION,
-    user: CURRENT_USER
+    user: CURRENT_USER,
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None)
 ):
-    results = service.search_all(db, q, user)
+    results = await service.search_all(db, q, user, limit, get_valid_search_cursor(cursor))
     return SuccessResponse(message="Search results fetched", data=results)
 
 @router.get("/trending", response_model=APIResponse[List[PostResponse]])
 async def get_trending(
     db: DB_SESSION
 ):
-    trending = service.get_trending_posts(db)
+    trending = await service.get_trending_posts(db)
     return SuccessResponse(message="Trending posts fetched", data=trending)
+
+@router.get("/users/autocomplete", response_model=APIResponse[List[str]])
+async def autocomplete_users(
+    db: DB_SESSION,
+    q: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=25)
+):
+    pseudonyms = await pseudonym_search.autocomplete(db, q, limit)
+    return SuccessResponse(message="Suggestions fetched", data=pseudonyms)
@@ -6,3 +6,5 @@ from src.auth.auth_schemas import UserListResponse
 class SearchResults(BaseModel):
     posts: List[PostResponse]
     users: List[UserListResponse]
+    # Continues the post results only; user matches are not paginated
+    next_cursor: Optional[str] = None
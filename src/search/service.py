@@ -1,60 +1,72 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, desc, func
-from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 from src.post.models import Post
-from src.auth.models import User_Account, Follow
-from src.post_actions.models import Comment, Vote
+from src.auth.models import User_Account
+from src.auth.auth_dependencies import UserPrincipal
+from src.auth.follow_graph import followed_ids
+from src.post_actions.models import Vote
 from src.post.schemas import PostResponse
 from src.auth.auth_schemas import UserListResponse
 from src.search.schemas import SearchResults
+from src.search.fulltext import search_post_ids
+from src.search.pseudonyms import pseudonym_search
+from src.search.inverted_index import post_index
+from src.utils.encoding import encode_score_cursor
+from typing import Optional
 
-def search_all(db: Session, query_str: str, current_user: User_Account = None) -> SearchResults:
-    # Search Posts
-    posts = db.query(Post).filter(
-        or_(
-            Post.title.ilike(f"%{query_str}%"),
-            Post.description.ilike(f"%{query_str}%")
-        )
-    ).limit(20).all()
+async def search_all(
+    db: AsyncSession,
+    query_str: str,
+    current_user: UserPrincipal = None,
+    limit: int = 20,
+    cursor: Optional[tuple[float, int]] = None
+) -> SearchResults:
+    # Search Posts: ranked full-text matches, one extra row to detect the next page
+    if post_index is not None:
+        ranked = post_index.search(query_str, limit + 1, cursor)
+    else:
+        ranked = await search_post_ids(db, query_str, limit + 1, cursor)
+    next_cursor = encode_score_cursor(*reversed(ranked[limit - 1])) if len(ranked) > limit else None
+    ranked = ranked[:limit]
+    
+    posts_by_id = {}
+    if ranked:
+        posts_by_id = {p.id: p for p in (await db.scalars(
+            select(Post).options(joinedload(Post.author)).where(Post.id.in_([post_id for post_id, _ in ranked]))
+        )).all()}
     
     post_responses = []
-    for p in posts:
+    for post_id, _ in ranked:
+        p = posts_by_id.get(post_id)
+        if p is None:
+            continue
         resp = PostResponse.model_validate(p)
         resp.pseudonym = p.author.pseudonym if p.author else "Anonymous"
         post_responses.append(resp)
         
-    # Search Users
-    users = db.query(User_Account).filter(
-        User_Account.pseudonym.ilike(f"%{query_str}%")
-    ).limit(20).all()
+    # Search Users: the trigram index also serves infix ILIKE, best matches first
+    users = (await db.scalars(pseudonym_search.order_by_similarity(
+        select(User_Account).where(User_Account.pseudonym.ilike(f"%{query_str}%")),
+        query_str
+    ).limit(20))).all()
     
-    user_responses = []
-    for u in users:
-        is_following = False
-        if current_user:
-            is_following = db.query(Follow).filter(
-                Follow.follower_id == current_user.id,
-                Follow.followed_id == u.id
-            ).first() is not None
-        user_responses.append(UserListResponse(pseudonym=u.pseudonym, is_following=is_following))
+    viewer_follows = await followed_ids(db, current_user, (u.id for u in users))
+    user_responses = [UserListResponse(pseudonym=u.pseudonym, is_following=u.id in viewer_follows) for u in users]
         
-    return SearchResults(posts=post_responses, users=user_responses)
+    return SearchResults(posts=post_responses, users=user_responses, next_cursor=next_cursor)
 
-def get_trending_posts(db: Session, limit: int = 5):
-    # Trending = (upvotes + comments) in the last 7 days
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    
-    # This is a simplified trending algorithm
-    trending_posts = db.query(
-        Post,
-        (Post.upvotes_count + func.count(Comment.id)).label("score")
-    ).outerjoin(Comment).filter(
-        Post.created_at >= seven_days_ago
-    ).group_by(Post.id).order_by(desc("score")).limit(limit).all()
+async def get_trending_posts(db: AsyncSession, limit: int = 5):
+    # Scores are maintained on write (see src/post/trending.py), so this is an index range read
+    trending_posts = (await db.scalars(
+        select(Post)
+        .order_by(Post.trending_score.desc(), Post.id.desc())
+        .limit(limit)
+        .options(selectinload(Post.author))
+    )).all()
     
-    # trending_posts is a list of tuples (Post, score)
     result = []
-    for p, score in trending_posts:
+    for p in trending_posts:
         resp = PostResponse.model_validate(p)
         resp.pseudonym = p.author.pseudonym if p.author else "Anonymous"
         result.append(resp)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from datetime import datetime
+from src.database import Base, BigIntegerPK
+
+class TaskStatus:
+    PENDING = "pending"
+    # Out of attempts; kept for inspection until someone deletes or requeues it
+    DEAD = "dead"
+
+class OutboxTask(Base):
+    __tablename__ = "task_outbox"
+
+    id = Column(BigIntegerPK, primary_key=True, index=True)
+    name = Column(String, nullable=False)  # key into TaskQueue.handlers
+    payload = Column(JSON, nullable=False)  # keyword arguments for the handler
+    status = Column(String, default=TaskStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    # Not claimable before this: moved forward while a worker holds the task and on retry backoff
+    run_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_task_outbox_status_run_at", "status", "run_at"),
+    )
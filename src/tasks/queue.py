@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import event, select, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config import settings
+from src.core.metrics import Histogram
+from src.database import AsyncSessionLocal
+from .models import OutboxTask, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+# A claimed task stays invisible to other workers while it waits in this worker's buffer and
+# then for the handler timeout plus this margin once a worker starts it. If the process dies
+# the lease simply runs out and another worker picks the task up.
+LEASE_MARGIN_SECONDS = 30
+MAX_BACKOFF_SECONDS = 3600
+# How long shutdown waits for claimed tasks before leaving them to their lease
+SHUTDOWN_GRACE_SECONDS = 10
+
+class TaskQueue:
+    """Durable background tasks: an outbox table drained by a bounded pool of workers.
+
+    enqueue() only adds a row to the caller's session, so a task exists exactly when
+    the change that caused it was committed. Each worker process claims at most
+    `capacity` tasks at a time, and every handler runs with its own session.
+    Delivery is at-least-once: a task that fails, times out or is cut off by a
+    restart runs again, up to `max_attempts` times with exponential backoff."""
+
+    def __init__(self, workers: int, capacity: int, poll_interval: float, max_attempts: int, timeout: float):
+        self.workers = workers
+        self.capacity = capacity
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.handlers: dict = {}
+        self.buffer: asyncio.Queue | None = None
+        self.wakeup = asyncio.Event()
+        self._wake_key = f"task_queue_wake:{id(self)}"
+        self.running = 0
+        self.completed = 0
+        self.retried = 0
+        self.dead = 0
+        # Created to picked up, and handler run time
+        self.lag_seconds = Histogram([0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900])
+        self.run_seconds = Histogram([0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30])
+        self._tasks: list[asyncio.Task] = []
+
+    def handler(self, name: str):
+        """Register an async function as the handler for tasks called `name`."""
+        def register(fn):
+            self.handlers[name] = fn
+            return fn
+        return register
+
+    async def enqueue(self, db: AsyncSession, name: str, **payload):
+        """Add a task to the caller's transaction. Payload values must be JSON serializable."""
+        db.add(OutboxTask(name=name, payload=payload, run_at=datetime.utcnow()))
+        # Start on it as soon as it is visible instead of at the next poll. One listener per
+        # session (SQLAlchemy ignores a repeat registration), armed by a flag per transaction.
+        db.info[self._wake_key] = True
+        if not event.contains(db.sync_session, "after_commit", self._wake):
+            event.listen(db.sync_session, "after_commit", self._wake)
+
+    def _wake(self, session):
+        if session.info.pop(self._wake_key, False):
+            self.wakeup.set()
+
+    def _lease(self, queued: int = 0) -> timedelta:
+        # Worst case for the last of `queued` tasks: every worker runs one full timeout per round ahead of it
+        rounds = math.ceil(queued / self.workers) + 1
+        return timedelta(seconds=rounds * self.timeout + LEASE_MARGIN_SECONDS)
+
+    async def claim(self, limit: int) -> list:
+        now = datetime.utcnow()
+        lease = self._lease(self.buffer.qsize() + limit if self.buffer else limit)
+        async with AsyncSessionLocal() as db:
+            ids = (await db.scalars(
+                select(OutboxTask.id)
+                .where(OutboxTask.status == TaskStatus.PENDING, OutboxTask.run_at <= now)
+                .order_by(OutboxTask.run_at, OutboxTask.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not ids:
+                return []
+            # Re-checking run_at means a row another worker claimed in between is skipped, not run twice
+            claimed = (await db.execute(
+                update(OutboxTask)
+                .where(OutboxTask.id.in_(ids), OutboxTask.status == TaskStatus.PENDING, OutboxTask.run_at <= now)
+                .values(run_at=now + lease, attempts=OutboxTask.attempts + 1)
+                .returning(OutboxTask.id, OutboxTask.name, OutboxTask.payload, OutboxTask.attempts, OutboxTask.created_at)
+                .execution_options(synchronize_session=False)
+            )).all()
+            await db.commit()
+        return claimed
+
+    async def _renew(self, task) -> bool:
+        """Restart the lease for the handler run. False if the task was claimed again meanwhile."""
+        async with AsyncSessionLocal() as db:
+            owned = await db.scalar(
+                update(OutboxTask)
+                .where(OutboxTask.id == task.id, OutboxTask.status == TaskStatus.PENDING, OutboxTask.attempts == task.attempts)
+                .values(run_at=datetime.utcnow() + self._lease())
+                .returning(OutboxTask.id)
+            )
+            await db.commit()
+        return owned is not None
+
+    async def _execute(self, task):
+        if not await self._renew(task):
+            logger.warning("Task %s (%s) outlived its lease in the buffer and was claimed again; skipping", task.id, task.name)
+            return
+        started = time.perf_counter()
+        self.lag_seconds.observe(max(0.0, (datetime.utcnow() - task.created_at).total_seconds()))
+        try:
+            handler = self.handlers.get(task.name)
+            if handler is None:
+                raise LookupError(f"No handler registered for task {task.name!r}")
+            await asyncio.wait_for(handler(**task.payload), self.timeout)
+        except Exception as e:
+            await self._fail(task, e)
+        else:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(OutboxTask).where(OutboxTask.id == task.id))
+                await db.commit()
+            self.completed += 1
+        finally:
+            self.run_seconds.observe(time.perf_counter() - started)
+
+    async def _fail(self, task, error: Exception):
+        values = {"last_error": f"{type(error).__name__}: {error}"[:500]}
+        if task.attempts >= self.max_attempts:
+            logger.error("Task %s (%s) failed %d times; giving up", task.id, task.name, task.attempts, exc_info=error)
+            values["status"] = TaskStatus.DEAD
+            self.dead += 1
+        else:
+            logger.warning("Task %s (%s) failed on attempt %d; retrying", task.id, task.name, task.attempts, exc_info=error)
+            backoff = min(2 ** task.attempts, MAX_BACKOFF_SECONDS)
+            values["run_at"] = datetime.utcnow() + timedelta(seconds=backoff)
+            self.retried += 1
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(OutboxTask).where(OutboxTask.id == task.id, OutboxTask.attempts == task.attempts).values(**values)
+            )
+            await db.commit()
+
+    async def _work(self):
+        while True:
+            task = await self.buffer.get()
+            self.running += 1
+            try:
+                await self._execute(task)
+            except Exception:
+                # Only reachable when recording the outcome failed; the lease brings the task back
+                logger.exception("Could not record the outcome of task %s", task.id)
+            finally:
+                self.running -= 1
+                self.buffer.task_done()
+                self.wakeup.set()
+
+    async def _dispatch(self):
+        while True:
+            self.wakeup.clear()
+            free = self.capacity - self.buffer.qsize()
+            claimed = []
+            if free > 0:
+                try:
+                    claimed = await self.claim(free)
+                except Exception:
+                    logger.exception("Claiming background tasks failed; retrying next poll")
+                for task in claimed:
+                    self.buffer.put_nowait(task)
+            # A full batch means there is probably more waiting
+            if free > 0 and len(claimed) == free:
+                continue
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stats(self) -> dict:
+        async with AsyncSessionLocal() as db:
+            pending, dead, oldest = (await db.execute(
+                select(
+                    func.count(OutboxTask.id).filter(OutboxTask.status == TaskStatus.PENDING),
+                    func.count(OutboxTask.id).filter(OutboxTask.status == TaskStatus.DEAD),
+                    func.min(OutboxTask.created_at).filter(OutboxTask.status == TaskStatus.PENDING),
+                )
+            )).one()
+        return {
+            "outbox_pending": pending,
+            "outbox_dead": dead,
+            "oldest_pending_seconds": (datetime.utcnow() - oldest).total_seconds() if oldest else None,
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "buffered": self.buffer.qsize() if self.buffer else 0,
+            "running": self.running,
+            "completed": self.completed,
+            "retried": self.retried,
+            "dead": self.dead,
+            "lag_seconds": self.lag_seconds.snapshot(),
+            "run_seconds": self.run_seconds.snapshot(),
+        }
+
+    def start(self):
+        if self._tasks:
+            return
+        self.buffer = asyncio.Queue(self.capacity)
+        self._tasks = [asyncio.create_task(self._dispatch())]
+        self._tasks += [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        if not self._tasks:
+            return
+        dispatcher, *workers = self._tasks
+        dispatcher.cancel()
+        try:
+            await asyncio.wait_for(self.buffer.join(), SHUTDOWN_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("Stopping with %d background tasks unfinished; they rerun once their lease expires",
+                           self.buffer.qsize() + self.running)
+        for worker in workers:
+            worker.cancel()
+        self._tasks = []
+
+task_queue = TaskQueue(
+    settings.TASK_WORKERS,
+    settings.TASK_BUFFER_SIZE,
+    settings.TASK_POLL_INTERVAL_SECONDS,
+    settings.TASK_MAX_ATTEMPTS,
+    settings.TASK_TIMEOUT_SECONDS
+)
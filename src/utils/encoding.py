@@ -1,4 +1,6 @@
+import base64
 import string
+from datetime import datetime
 
 # Shuffled Base 52 (No vowels: a, e, i, o, u, A, E, I, O, U)
 CHARSET = "N2Z7P9K6R3V8T4BX5W1GYQSDFHJLMC0bgjknpqrstvwxyzHJKMNPQRSTVWXYZ"
@@ -19,4 +21,24 @@ def decode_ids(s: str) -> int:
     num = 0
     for i, char in enumerate(reversed(s)):
         num += CHARSET.index(char) * (BASE ** i)
-    return num - MIN_LENGTH_OFFSET
\ No newline at end of file
+    return num - MIN_LENGTH_OFFSET
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for (created_at, id) ordered listings."""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    created_at, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+    return datetime.fromisoformat(created_at), int(row_id)
+
+def encode_score_cursor(score: float, row_id: int) -> str:
+    """Opaque keyset cursor for (score, id) ranked listings."""
+    raw = f"{score!r}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_score_cursor(cursor: str) -> tuple[float, int]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    score, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+    return float(score), int(row_id)
@@ -0,0 +1,66 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+# Settings are read at import time, so point them at a throwaway SQLite database first
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/ichtaka-test.db"
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-with-at-least-32-bytes")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("AGENT_URL", "http://agent.invalid")
+os.environ.setdefault("AGENT_API_KEY", "test")
+
+import itertools
+import pytest
+from sqlalchemy import event
+import src.app  # registers every model on Base.metadata
+from src.auth.auth_dependencies import UserPrincipal
+from src.auth.models import User_Account
+from src.database import Base, AsyncSessionLocal, async_engine, engine
+from src.migrations import run_migrations
+
+_names = itertools.count()
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        run_migrations(conn)
+    yield
+    engine.dispose()
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+async def db():
+    async with AsyncSessionLocal() as session:
+        yield session
+    # Pooled aiosqlite connections are bound to this test's event loop
+    await async_engine.dispose()
+
+async def make_user(db, prefix: str = "user") -> UserPrincipal:
+    user = User_Account(
+        login_id=f"login-{prefix}-{next(_names)}",
+        public_key="unused",
+        recovery_phrase_hashes=[],
+        pseudonym=f"{prefix}{next(_names)}"
+    )
+    db.add(user)
+    await db.commit()
+    return UserPrincipal(id=user.id, pseudonym=user.pseudonym)
+
+@contextmanager
+def count_queries():
+    """Collects every statement sent to the database inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
@@ -0,0 +1,43 @@
+import pytest
+from fastapi import HTTPException, Response
+from src.auth.auth_dependencies import authenticate, principal_cache, token_cache_key
+from src.auth.auth_service import create_access_token, logout
+from src.auth.blacklist_service import blacklist
+from .conftest import make_user, count_queries
+
+pytestmark = pytest.mark.anyio
+
+async def login(db, prefix: str):
+    user = await make_user(db, prefix)
+    return user, create_access_token({"sub": str(user.id), "pseudonym": user.pseudonym})
+
+async def test_cached_principal_costs_no_queries(db):
+    user, token = await login(db, "cached")
+    with count_queries() as statements:
+        assert await authenticate(db, token) == user
+    assert len(statements) == 1
+
+    with count_queries() as statements:
+        assert await authenticate(db, token) == user
+    assert statements == []
+
+async def test_logout_evicts_the_cached_principal(db):
+    _, token = await login(db, "logout")
+    await authenticate(db, token)
+    assert await principal_cache.get(token_cache_key(token)) is not None
+
+    await logout(db, None, Response(), access_token=token)
+    assert await principal_cache.get(token_cache_key(token)) is None
+    with pytest.raises(HTTPException) as error:
+        await authenticate(db, token)
+    assert error.value.status_code == 401
+
+async def test_blacklisted_token_is_refused_despite_a_cached_principal(db):
+    _, token = await login(db, "revoked")
+    await authenticate(db, token)
+
+    await blacklist.add(token)
+    with count_queries() as statements, pytest.raises(HTTPException) as error:
+        await authenticate(db, token)
+    assert error.value.status_code == 401
+    assert statements == []
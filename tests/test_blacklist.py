@@ -0,0 +1,43 @@
+import time
+import jwt
+import pytest
+from src.auth.blacklist_service import RedisTokenBlacklist
+from src.config import settings
+
+fakeredis = pytest.importorskip("fakeredis")
+pytestmark = pytest.mark.anyio
+
+def access_token(subject: str, ttl: int = 600) -> str:
+    return jwt.encode({"sub": subject, "exp": int(time.time()) + ttl}, "secret", algorithm="HS256")
+
+def worker(server) -> RedisTokenBlacklist:
+    blacklist = RedisTokenBlacklist("redis://localhost")
+    blacklist.client = fakeredis.aioredis.FakeRedis(server=server)
+    return blacklist
+
+async def test_sync_only_reads_new_revocations():
+    server = fakeredis.FakeServer()
+    a, b = worker(server), worker(server)
+    await a.add(access_token("1"))
+    await b.sync()  # first sync rebuilds from the sorted set
+    assert await b.is_blacklisted(access_token("1"))
+    rebuilt_at = b.rebuilt_at
+
+    revoked = access_token("2")
+    assert not await b.is_blacklisted(revoked)
+    await a.add(revoked)
+    await b.sync()
+    assert b.rebuilt_at == rebuilt_at  # incremental, not another full scan
+    assert await b.is_blacklisted(revoked)
+    assert not await b.is_blacklisted(access_token("3"))
+
+async def test_full_rebuild_drops_expired_revocations(monkeypatch):
+    server = fakeredis.FakeServer()
+    a, b = worker(server), worker(server)
+    await a.add(access_token("1", ttl=1))
+    await b.sync()
+    assert b.bloom.count == 1
+    monkeypatch.setattr(settings, "TOKEN_BLACKLIST_REBUILD_SECONDS", 0)
+    monkeypatch.setattr(time, "time", lambda real=time.time: real() + 5)
+    await b.sync()
+    assert b.bloom.count == 0
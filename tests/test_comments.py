@@ -0,0 +1,51 @@
+import pytest
+from src.post.models import Post
+from src.post_actions.models import Comment
+from src.post_actions.schemas import CommentCreate
+from src.post_actions.service import add_comment, get_comments, get_thread
+from .conftest import make_user, count_queries
+
+pytestmark = pytest.mark.anyio
+
+async def build_thread(db, author, size: int) -> tuple[int, int]:
+    """A post with one root comment and `size` replies, each with one nested reply."""
+    post = Post(title="Thread", description="comment tree under test")
+    db.add(post)
+    await db.commit()
+    root = await add_comment(db, author, post.id, CommentCreate(content="root"))
+    for i in range(size):
+        parent = root
+        for content in (f"reply {i}", f"nested {i}"):
+            parent = Comment(
+                post_id=post.id, user_id=author.id, content=content,
+                parent_id=parent.id, path=parent.subtree_prefix, depth=parent.depth + 1
+            )
+            db.add(parent)
+            await db.flush()
+    await db.commit()
+    return post.id, root.id
+
+@pytest.mark.parametrize("size", [1, 20])
+async def test_thread_query_count_is_constant(db, size):
+    author = await make_user(db)
+    post_id, root_id = await build_thread(db, author, size)
+    db.expunge_all()
+
+    with count_queries() as statements:
+        thread = await get_thread(db, post_id, root_id)
+    assert len(statements) == 2, statements
+    assert len(thread.replies) == size
+    assert all(len(reply.replies) == 1 for reply in thread.replies)
+    assert thread.replies[0].replies[0].pseudonym == author.pseudonym
+
+@pytest.mark.parametrize("size", [1, 20])
+async def test_comment_page_query_count_is_constant(db, size):
+    author = await make_user(db)
+    post_id, root_id = await build_thread(db, author, size)
+    db.expunge_all()
+
+    with count_queries() as statements:
+        page = await get_comments(db, post_id)
+    assert len(statements) == 1, statements
+    assert [c.id for c in page.comments] == [root_id]
+    assert page.comments[0].replies_count == size
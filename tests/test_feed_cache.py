@@ -0,0 +1,68 @@
+import json
+import pytest
+from sqlalchemy import select
+from src.agent.router import agent_callback
+from src.agent.schemas import AnalyzeCallback
+from src.post import service
+from src.post.models import Post, PostStatus
+from src.post.schemas import PostCreate, PostUpdate
+from src.post_actions.models import Vote, VoteType
+from src.post_actions.service import update_post_status
+from src.utils.encoding import encode_ids, decode_ids
+from .conftest import make_user, count_queries
+
+pytestmark = pytest.mark.anyio
+
+async def feed(db, author, viewer=None) -> list[dict]:
+    response = await service.get_feed(db, limit=50, user=viewer, pseudonym=author.pseudonym)
+    return json.loads(response.body)["data"]["posts"]
+
+async def test_cache_hit_overlays_each_viewers_votes(db):
+    author = await make_user(db, "author")
+    voter, bystander = await make_user(db, "voter"), await make_user(db, "bystander")
+    await service.create_post(db, author, PostCreate(title="Cached post", description="served from the cache"))
+    await feed(db, author)
+    post_id = await db.scalar(select(Post.id).where(Post.user_id == author.id))
+    db.add(Vote(post_id=post_id, user_id=voter.id, vote_type=VoteType.UPVOTE))
+    await db.commit()
+
+    with count_queries() as statements:
+        [seen_by_voter] = await feed(db, author, voter)
+        [seen_by_bystander] = await feed(db, author, bystander)
+    # Only the per-viewer vote lookups; the page itself came from the cache
+    assert len(statements) == 2, statements
+    assert seen_by_voter["user_vote_status"] == "upvote"
+    assert seen_by_bystander["user_vote_status"] == "none"
+
+async def round_trippable_post(db, author) -> Post:
+    # Agent callbacks address posts by encoded id, and not every id survives encode/decode
+    post_id = 10_000_000
+    while decode_ids(encode_ids(post_id)) != post_id:
+        post_id += 1
+    post = Post(id=post_id, user_id=author.id, title="Reported", description="awaiting review")
+    db.add(post)
+    await db.commit()
+    return post
+
+async def test_every_write_invalidates_the_cache(db):
+    author = await make_user(db, "author")
+    post = await round_trippable_post(db, author)
+    assert [p["title"] for p in await feed(db, author)] == ["Reported"]
+
+    await service.create_post(db, author, PostCreate(title="Second", description="a new post"))
+    assert len(await feed(db, author)) == 2
+
+    await service.update_post(db, post.id, PostUpdate(title="Edited"))
+    assert "Edited" in [p["title"] for p in await feed(db, author)]
+
+    await update_post_status(db, post.id, PostStatus.CONFIRMED)
+    assert {p["status"] for p in await feed(db, author) if p["id"] == encode_ids(post.id)} == {"confirmed"}
+
+    await agent_callback(
+        AnalyzeCallback(report_id=encode_ids(post.id), verdict="auto-reject", pii_found=False, integral_score=0.1),
+        db
+    )
+    assert {p["status"] for p in await feed(db, author) if p["id"] == encode_ids(post.id)} == {"refuted"}
+
+    await service.delete_post(db, post.id)
+    assert [p["title"] for p in await feed(db, author)] == ["Second"]
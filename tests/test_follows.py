@@ -0,0 +1,59 @@
+import json
+import pytest
+from src.auth.auth_service import get_followers, get_following
+from src.auth.models import Follow
+from src.post.models import Post
+from src.search.service import search_all
+from .conftest import make_user, count_queries
+
+pytestmark = pytest.mark.anyio
+
+async def audience(db, size: int):
+    """A followed account, `size` followers of it, and a viewer who follows every other one of them."""
+    star = await make_user(db, "star")
+    viewer = await make_user(db, "viewer")
+    fans = [await make_user(db, "fan") for _ in range(size)]
+    for i, fan in enumerate(fans):
+        db.add(Follow(follower_id=fan.id, followed_id=star.id))
+        db.add(Follow(follower_id=star.id, followed_id=fan.id))
+        if i % 2 == 0:
+            db.add(Follow(follower_id=viewer.id, followed_id=fan.id))
+    await db.commit()
+    return star, viewer, fans
+
+def listed_users(response) -> list[dict]:
+    return json.loads(response.body)["data"]["users"]
+
+@pytest.mark.parametrize("size", [2, 20])
+async def test_followers_query_count_is_constant(db, size):
+    star, viewer, fans = await audience(db, size)
+
+    with count_queries() as statements:
+        response = await get_followers(db, star.pseudonym, viewer, limit=50)
+    # The account, one page of followers, one IN lookup for is_following
+    assert len(statements) == 3, statements
+    flags = {user["pseudonym"]: user["is_following"] for user in listed_users(response)}
+    assert flags == {fan.pseudonym: i % 2 == 0 for i, fan in enumerate(fans)}
+
+@pytest.mark.parametrize("size", [2, 20])
+async def test_following_query_count_is_constant(db, size):
+    star, viewer, fans = await audience(db, size)
+
+    with count_queries() as statements:
+        response = await get_following(db, star.pseudonym, viewer, limit=50)
+    assert len(statements) == 3, statements
+    assert sum(user["is_following"] for user in listed_users(response)) == (size + 1) // 2
+
+@pytest.mark.parametrize("size", [2, 20])
+async def test_search_query_count_is_constant(db, size):
+    star, viewer, fans = await audience(db, size)
+    db.add(Post(title=f"Meet {fans[0].pseudonym}", description="for everyone who follows", user_id=star.id))
+    await db.commit()
+
+    with count_queries() as statements:
+        results = await search_all(db, fans[0].pseudonym, viewer)
+    # Post ids, the posts themselves, matching users, one IN lookup for is_following
+    assert len(statements) == 4, statements
+    assert results.posts[0].pseudonym == star.pseudonym
+    flags = {user.pseudonym: user.is_following for user in results.users}
+    assert flags[fans[0].pseudonym] is True
@@ -0,0 +1,71 @@
+import uuid
+import pytest
+from src.post import service
+from src.post.models import Post
+from src.post.schemas import PostUpdate
+from src.search.fulltext import search_post_ids
+from src.search.service import search_all
+from src.utils.encoding import decode_score_cursor
+
+pytestmark = pytest.mark.anyio
+
+def unique_word() -> str:
+    # Letters only, so the tokenizer keeps it whole; keeps tests independent of each other's posts
+    return "w" + "".join(chr(ord("a") + int(c, 16)) for c in uuid.uuid4().hex[:12])
+
+async def add_posts(db, *texts: tuple[str, str]) -> list[int]:
+    posts = [Post(title=title, description=description) for title, description in texts]
+    db.add_all(posts)
+    await db.commit()
+    return [post.id for post in posts]
+
+async def matching_ids(db, query: str) -> list[int]:
+    return [post_id for post_id, _ in await search_post_ids(db, query, 100)]
+
+async def test_ranking_prefers_more_relevant_posts(db):
+    word = unique_word()
+    strong, weak = await add_posts(
+        db,
+        (f"{word} {word}", f"all about {word}"),
+        ("an unrelated title", f"a long description that mentions {word} only once among many other words"),
+    )
+    results = await search_post_ids(db, word, 10)
+    assert [post_id for post_id, _ in results] == [strong, weak]
+    assert results[0][1] > results[1][1]
+
+async def test_every_term_must_match_and_the_last_is_a_prefix(db):
+    word, other = unique_word(), unique_word()
+    both, only_first = await add_posts(db, (f"{word} {other}", "both terms"), (word, "first term only"))
+    assert sorted(await matching_ids(db, word)) == sorted([both, only_first])
+    assert await matching_ids(db, f"{word} {other}") == [both]
+    assert await matching_ids(db, f"{word} {other[:4]}") == [both]
+    # Only the last term is a prefix
+    assert await matching_ids(db, f"{word[:4]} {other}") == []
+
+async def test_cursor_paging_has_no_duplicates_or_gaps(db):
+    word = unique_word()
+    # Equal scores are common; the id tie-break has to keep pages apart
+    ids = await add_posts(db, *[(f"{word} post", "the same description") for _ in range(7)], *[(word, f"{word} appears twice") for _ in range(4)])
+
+    seen, cursor = [], None
+    while True:
+        page = await search_all(db, word, limit=3, cursor=cursor)
+        assert len(page.posts) <= 3
+        seen += [post.id for post in page.posts]
+        if not page.next_cursor:
+            break
+        cursor = decode_score_cursor(page.next_cursor)
+    assert len(seen) == len(set(seen))
+    assert sorted(seen) == sorted(ids)
+
+async def test_index_follows_updates_and_deletes(db):
+    old, new = unique_word(), unique_word()
+    [post_id] = await add_posts(db, (old, "indexed text"))
+    assert await matching_ids(db, old) == [post_id]
+
+    await service.update_post(db, post_id, PostUpdate(title=new))
+    assert await matching_ids(db, old) == []
+    assert await matching_ids(db, new) == [post_id]
+
+    await service.delete_post(db, post_id)
+    assert await matching_ids(db, new) == []
@@ -0,0 +1,95 @@
+from src.search.inverted_index import InvertedIndex
+
+WATERMARK = [3, 3, "2026-01-01T00:00:00"]
+
+def make_index(snapshot_path=None) -> InvertedIndex:
+    index = InvertedIndex(snapshot_path)
+    index.add(1, "apple pie", "a sweet apple dessert with cinnamon")
+    index.add(2, "banana bread", "baked with ripe banana and a little apple")
+    index.add(3, "cherry tart", "sour cherry filling")
+    return index
+
+def matches(index: InvertedIndex, query: str) -> list[int]:
+    return sorted(post_id for post_id, _ in index.search(query, 100))
+
+def test_add_remove_and_update():
+    index = make_index()
+    assert matches(index, "cherry") == [3]
+
+    index.remove(3, "cherry tart", "sour cherry filling")
+    assert matches(index, "cherry") == []
+    assert "cherry" not in index.vocabulary
+    assert 3 not in index.doc_lengths
+
+    # An update is a remove of the old text followed by an add of the new one
+    index.remove(2, "banana bread", "baked with ripe banana and a little apple")
+    index.add(2, "plum bread", "baked with ripe plums")
+    assert matches(index, "banana") == []
+    assert matches(index, "plum") == [2]
+    assert matches(index, "apple") == [1]
+    assert index.total_length == sum(index.doc_lengths.values())
+
+def test_every_term_must_match_and_the_last_is_a_prefix():
+    index = make_index()
+    assert matches(index, "apple") == [1, 2]
+    assert matches(index, "apple banana") == [2]
+    assert matches(index, "apple ban") == [2]
+    assert matches(index, "ba") == [2]
+    assert matches(index, "ban apple") == []
+    assert matches(index, "missing apple") == []
+
+def test_ranking_prefers_more_relevant_posts():
+    index = make_index()
+    results = index.search("apple", 10)
+    assert [post_id for post_id, _ in results] == [1, 2]
+    assert results[0][1] > results[1][1]
+
+def test_cursor_pages_without_gaps_or_duplicates():
+    index = InvertedIndex()
+    for post_id in range(1, 26):
+        index.add(post_id, "common title", "common words " * (post_id % 4 + 1))
+    seen, cursor = [], None
+    while True:
+        page = index.search("common", 4, cursor)
+        if not page:
+            break
+        seen += [post_id for post_id, _ in page]
+        post_id, score = page[-1]
+        cursor = (score, post_id)
+    assert sorted(seen) == list(range(1, 26))
+    assert len(seen) == len(set(seen))
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "index.bin")
+    index = make_index(path)
+    index.save_snapshot(WATERMARK)
+
+    loaded = InvertedIndex(path)
+    assert loaded.load_snapshot(WATERMARK)
+    assert loaded.vocabulary == index.vocabulary
+    assert loaded.doc_lengths == index.doc_lengths
+    assert loaded.search("apple", 10) == index.search("apple", 10)
+    assert isinstance(loaded.ids["apple"], memoryview)
+
+    # Writes copy the touched posting lists out of the mapping and leave the file alone
+    loaded.add(4, "apple crumble", "more apple")
+    loaded.remove(1, "apple pie", "a sweet apple dessert with cinnamon")
+    assert matches(loaded, "apple") == [2, 4]
+    assert isinstance(loaded.ids["cherry"], memoryview)
+    reread = InvertedIndex(path)
+    assert reread.load_snapshot(WATERMARK)
+    assert matches(reread, "apple") == [1, 2]
+
+def test_stale_or_corrupt_snapshot_is_rejected(tmp_path):
+    path = str(tmp_path / "index.bin")
+    make_index(path).save_snapshot(WATERMARK)
+
+    stale = InvertedIndex(path)
+    assert not stale.load_snapshot([4, 4, "2026-01-01T00:00:00"])
+    assert stale.doc_lengths == {}
+
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 6)
+    truncated = InvertedIndex(path)
+    assert not truncated.load_snapshot(WATERMARK)
+    assert truncated.ids == {} and truncated.doc_lengths == {}
@@ -0,0 +1,46 @@
+import math
+import pytest
+from src.auth.models import User_Account
+from src.auth.pseudonym_filter import PseudonymFilter
+from src.core.bloom import BloomFilter
+from src.database import engine
+
+pytestmark = pytest.mark.anyio
+
+@pytest.mark.parametrize("error_rate", [0.01, 0.001])
+def test_bloom_false_positive_rate_and_size(error_rate):
+    n = 20_000
+    bloom = BloomFilter(n, error_rate)
+    for i in range(n):
+        bloom.add(f"taken-{i}")
+
+    assert all(f"taken-{i}" in bloom for i in range(n))
+    probes = 100_000
+    false_positives = sum(f"free-{i}" in bloom for i in range(probes))
+    assert false_positives / probes < 1.5 * error_rate
+    # The textbook optimum: -n ln(p) / ln(2)^2 bits
+    optimal_bytes = -n * math.log(error_rate) / math.log(2) ** 2 / 8
+    assert bloom.memory_bytes <= optimal_bytes + 1
+
+async def test_refresh_picks_up_rows_committed_out_of_id_order(db):
+    pseudonym_filter = PseudonymFilter(0.001)
+    with engine.connect() as conn:
+        pseudonym_filter.build(conn)
+    base = pseudonym_filter.max_id
+
+    def account(user_id: int, pseudonym: str) -> User_Account:
+        return User_Account(id=user_id, login_id=f"login-{pseudonym}", public_key="unused",
+                            recovery_phrase_hashes=[], pseudonym=pseudonym)
+
+    # The higher id commits first; the lower one was still in flight during that refresh
+    db.add(account(base + 10, "late_high"))
+    await db.commit()
+    await pseudonym_filter.refresh()
+    pseudonym_filter.add("local_signup")
+    db.add(account(base + 5, "late_low"))
+    await db.commit()
+    await pseudonym_filter.refresh()
+
+    assert pseudonym_filter.might_exist("late_high")
+    assert pseudonym_filter.might_exist("late_low")
+    assert pseudonym_filter.might_exist("local_signup")
@@ -0,0 +1,39 @@
+import json
+import uuid
+import pytest
+from src.auth.auth_schemas import SignupRequest
+from src.auth.auth_service import signup
+from src.database import engine
+from src.search.pseudonyms import PrefixIndex, pseudonym_search
+from src.search.router import autocomplete_users
+from .conftest import make_user
+
+pytestmark = pytest.mark.anyio
+
+def test_prefix_index_ranks_closest_names_first():
+    index = PrefixIndex(["alexandra", "Alex", "alexa", "bob", "alfred", "ALEX_99"])
+    assert index.complete("alex", 10) == ["Alex", "alexa", "ALEX_99", "alexandra"]
+    assert index.complete("ALE", 2) == ["Alex", "alexa"]
+    assert index.complete("zed", 10) == []
+
+def test_prefix_index_ignores_duplicates():
+    index = PrefixIndex(["carol"])
+    index.add("carol")
+    index.add("Carolyn")
+    assert index.complete("car", 10) == ["carol", "Carolyn"]
+
+async def test_autocomplete_limit_and_new_signups(db):
+    stem = "ac" + uuid.uuid4().hex[:6]
+    for _ in range(5):
+        await make_user(db, stem)
+    with engine.connect() as conn:
+        pseudonym_search.setup(conn)
+
+    response = await autocomplete_users(db, stem, limit=3)
+    assert len(json.loads(response.body)["data"]) == 3
+
+    newcomer = stem + "_new"
+    await signup(db, SignupRequest(pseudonym=newcomer, public_key="unused", recovery_phrase_hashes=["h"] * 12))
+    suggestions = await pseudonym_search.autocomplete(db, newcomer[:-1], 10)
+    assert suggestions == [newcomer]
+    assert newcomer in await pseudonym_search.autocomplete(db, stem, 25)
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import select, update, delete
+from src.auth.models import Follow
+from src.notifications import service as notifications
+from src.tasks.models import OutboxTask
+from src.tasks.queue import TaskQueue, LEASE_MARGIN_SECONDS
+from .conftest import make_user
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def outbox(db):
+    await db.execute(delete(OutboxTask))
+    await db.commit()
+    yield
+    await db.execute(delete(OutboxTask))
+    await db.commit()
+
+async def test_lease_covers_time_waiting_in_the_buffer(db, outbox):
+    queue = TaskQueue(workers=2, capacity=10, poll_interval=1, max_attempts=3, timeout=30)
+    for i in range(10):
+        await queue.enqueue(db, "noop", i=i)
+    await db.commit()
+
+    claimed = await queue.claim(10)
+    run_at = await db.scalar(select(OutboxTask.run_at).where(OutboxTask.id == claimed[-1].id))
+    # Ten tasks on two workers: the last one may wait five full timeouts before it starts
+    assert run_at - datetime.utcnow() > timedelta(seconds=5 * 30 + LEASE_MARGIN_SECONDS)
+
+async def test_task_claimed_again_is_not_run_twice(db, outbox):
+    queue = TaskQueue(workers=1, capacity=10, poll_interval=1, max_attempts=3, timeout=30)
+    calls = []
+
+    @queue.handler("record")
+    async def record():
+        calls.append(1)
+
+    await queue.enqueue(db, "record")
+    await db.commit()
+    [task] = await queue.claim(1)
+    # Its lease ran out in the buffer and another worker claimed it
+    await db.execute(update(OutboxTask).where(OutboxTask.id == task.id).values(attempts=OutboxTask.attempts + 1))
+    await db.commit()
+
+    await queue._execute(task)
+    assert calls == []
+    assert await db.get(OutboxTask, task.id) is not None
+
+async def test_follower_fanout_is_chunked(db, outbox, monkeypatch):
+    monkeypatch.setattr(notifications, "FANOUT_BATCH_SIZE", 3)
+    author = await make_user(db, "author")
+    followers = [await make_user(db, "reader") for _ in range(7)]
+    for follower in followers:
+        db.add(Follow(follower_id=follower.id, followed_id=author.id))
+    await db.commit()
+
+    recipients, payload, fanout_tasks = [], {"author_id": author.id, "message": "new post"}, 0
+    while payload is not None:
+        await notifications.notify_followers(**payload)
+        fanout_tasks += 1
+        tasks = (await db.scalars(select(OutboxTask))).all()
+        recipients += [t.payload["recipient_id"] for t in tasks if t.name == "notification"]
+        follow_up = [t.payload for t in tasks if t.name == "notify_followers"]
+        assert len(follow_up) <= 1
+        payload = follow_up[0] if follow_up else None
+        await db.execute(delete(OutboxTask))
+        await db.commit()
+
+    assert fanout_tasks == 3
+    assert sorted(recipients) == sorted(f.id for f in followers)
+
+async def test_every_committed_enqueue_wakes_the_dispatcher(db, outbox):
+    queue = TaskQueue(workers=1, capacity=10, poll_interval=1, max_attempts=3, timeout=30)
+    for i in range(3):
+        await queue.enqueue(db, "noop", i=i)
+        assert not queue.wakeup.is_set()
+        await db.commit()
+        assert queue.wakeup.is_set()
+        queue.wakeup.clear()
+
+    # A commit with nothing enqueued leaves the dispatcher asleep
+    await db.commit()
+    assert not queue.wakeup.is_set()
@@ -0,0 +1,84 @@
+import math
+import time
+from datetime import datetime
+import pytest
+from sqlalchemy import update
+from src.database import SessionLocal
+from src.post.models import Post
+from src.post.trending import rebuild_trending_scores, current_score, TIME_SCALE
+from src.search.service import get_trending_posts
+from src.post_actions import service
+from src.post_actions.models import VoteType
+from src.post_actions.vote_buffer import VoteCounterBuffer
+from .conftest import make_user
+
+pytestmark = pytest.mark.anyio
+
+EDITED_AT = datetime(2024, 1, 1, 12, 0, 0)
+
+async def make_post(db) -> int:
+    post = Post(title="Trending", description="score maintenance under test", updated_at=EDITED_AT)
+    db.add(post)
+    await db.commit()
+    return post.id
+
+async def reload(db, post_id: int) -> Post:
+    db.expire_all()
+    return await db.get(Post, post_id)
+
+async def test_score_maintenance_does_not_touch_updated_at(db, monkeypatch):
+    post_id = await make_post(db)
+    voter = await make_user(db, "voter")
+
+    await service.cast_vote(db, voter, post_id, VoteType.UPVOTE)
+    buffer = VoteCounterBuffer(interval=60)
+    monkeypatch.setattr(service, "vote_buffer", buffer)
+    await service.cast_vote(db, voter, post_id, VoteType.DOWNVOTE)
+    await buffer.flush()
+    with SessionLocal() as sync_db:
+        rebuild_trending_scores(sync_db)
+
+    post = await reload(db, post_id)
+    assert post.updated_at == EDITED_AT
+    assert post.downvotes_count == 1
+
+async def test_withdrawn_upvote_never_leaves_a_negative_score(db):
+    post_id = await make_post(db)
+    voter = await make_user(db, "voter")
+    await service.cast_vote(db, voter, post_id, VoteType.UPVOTE)
+    # Move the upvote three half-lives into the past before it is withdrawn
+    await db.execute(update(Post).where(Post.id == post_id).values(
+        trending_score=Post.trending_score - 3 * math.log(2)
+    ))
+    await db.commit()
+    await service.cast_vote(db, voter, post_id, VoteType.UPVOTE)
+
+    post = await reload(db, post_id)
+    assert post.upvotes_count == 0
+    assert post.trending_score == 0
+
+async def test_recent_activity_outranks_older_activity_without_a_sweep(db):
+    older, newer = await make_post(db), await make_post(db)
+    voter = await make_user(db, "voter")
+    # Three upvotes two half-lives ago are worth 0.75 now, one upvote now is worth 1
+    await db.execute(update(Post).where(Post.id == older).values(
+        trending_score=math.log(3) + time.time() / TIME_SCALE - 2 * math.log(2)
+    ))
+    await db.commit()
+    await service.cast_vote(db, voter, newer, VoteType.UPVOTE)
+
+    now = time.time()
+    assert current_score((await reload(db, older)).trending_score, now) == pytest.approx(0.75, rel=1e-3)
+    assert current_score((await reload(db, newer)).trending_score, now) == pytest.approx(1.0, rel=1e-3)
+    ranked = [post.id for post in await get_trending_posts(db, limit=100)]
+    assert ranked.index(newer) < ranked.index(older)
+
+async def test_rebuild_matches_incremental_scores(db):
+    post_id = await make_post(db)
+    for name in ("first", "second"):
+        await service.cast_vote(db, await make_user(db, name), post_id, VoteType.UPVOTE)
+    incremental = (await reload(db, post_id)).trending_score
+    with SessionLocal() as sync_db:
+        rebuild_trending_scores(sync_db)
+    assert (await reload(db, post_id)).trending_score == pytest.approx(incremental, abs=1e-3)
+    assert current_score(incremental, time.time()) == pytest.approx(2.0, rel=1e-3)
@@ -0,0 +1,88 @@
+import asyncio
+import random
+import pytest
+from sqlalchemy import select, func
+from src.database import AsyncSessionLocal
+from src.post.models import Post
+from src.post_actions import service
+from src.post_actions.models import Vote, VoteType
+from src.post_actions.vote_buffer import VoteCounterBuffer
+from .conftest import make_user
+
+pytestmark = pytest.mark.anyio
+
+async def hammer(post_id: int, voters, votes_each: int, seed: int):
+    """Every voter casts random votes on the post concurrently, each vote in its own session like a request."""
+    rng = random.Random(seed)
+
+    async def vote(user, vote_type):
+        async with AsyncSessionLocal() as db:
+            await service.cast_vote(db, user, post_id, vote_type)
+
+    plan = [(user, rng.choice(list(VoteType))) for user in voters for _ in range(votes_each)]
+    rng.shuffle(plan)
+    await asyncio.gather(*(vote(user, vote_type) for user, vote_type in plan))
+
+async def assert_counters_match_votes(db, post_id: int):
+    db.expire_all()
+    post = await db.get(Post, post_id)
+    actual = dict((await db.execute(
+        select(Vote.vote_type, func.count()).where(Vote.post_id == post_id).group_by(Vote.vote_type)
+    )).all())
+    assert post.upvotes_count == actual.get(VoteType.UPVOTE, 0)
+    assert post.downvotes_count == actual.get(VoteType.DOWNVOTE, 0)
+
+async def make_post(db) -> int:
+    post = Post(title="Hot post", description="everyone votes on this")
+    db.add(post)
+    await db.commit()
+    return post.id
+
+async def test_concurrent_votes_keep_counters_exact(db):
+    post_id = await make_post(db)
+    voters = [await make_user(db, "voter") for _ in range(20)]
+    await hammer(post_id, voters, votes_each=10, seed=1)
+    await assert_counters_match_votes(db, post_id)
+
+async def test_one_user_racing_their_own_votes(db):
+    # Toggle-off and switch race each other here, not just inserts
+    post_id = await make_post(db)
+    voter = await make_user(db, "voter")
+    await hammer(post_id, [voter], votes_each=30, seed=2)
+    await assert_counters_match_votes(db, post_id)
+
+async def test_write_behind_buffer_converges(db, monkeypatch):
+    buffer = VoteCounterBuffer(interval=60)
+    monkeypatch.setattr(service, "vote_buffer", buffer)
+    post_id = await make_post(db)
+    voters = [await make_user(db, "voter") for _ in range(10)]
+    await hammer(post_id, voters, votes_each=10, seed=3)
+    await buffer.flush()
+    assert not buffer.pending
+    await assert_counters_match_votes(db, post_id)
+
+async def test_cancelled_flush_keeps_deltas(monkeypatch):
+    class StalledConnection:
+        async def execute(self, *args):
+            await asyncio.Event().wait()
+
+    class StalledEngine:
+        def begin(self):
+            class Transaction:
+                async def __aenter__(self):
+                    return StalledConnection()
+
+                async def __aexit__(self, *exc):
+                    return False
+            return Transaction()
+
+    from src.post_actions import vote_buffer as module
+    monkeypatch.setattr(module, "async_engine", StalledEngine())
+    buffer = VoteCounterBuffer(interval=60)
+    buffer.add(1, 2, 1)
+    flush = asyncio.create_task(buffer.flush())
+    await asyncio.sleep(0.01)
+    flush.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flush
+    assert buffer.pending_for(1) == (2, 1)